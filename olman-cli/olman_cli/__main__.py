@@ -2,8 +2,10 @@
 
 import argparse
 
+from olman_cli.cache import cache
 from olman_cli.info import info
 from olman_cli.install import install
+from olman_cli.lock import lock
 from olman_cli.remove import remove
 from olman_cli.search import search
 from olman_cli.update import update
@@ -28,6 +30,10 @@ def main():
     install_parser = subparsers.add_parser("install")
     install_parser.set_defaults(func=lambda x: install(install_parser, x))
 
+    # lock
+    lock_parser = subparsers.add_parser("lock")
+    lock_parser.set_defaults(func=lambda x: lock(lock_parser, x))
+
     # remove
     remove_parser = subparsers.add_parser("remove")
     remove_parser.set_defaults(func=lambda x: remove(remove_parser, x))
@@ -40,6 +46,10 @@ def main():
     info_parser = subparsers.add_parser("info")
     info_parser.set_defaults(func=lambda x: info(info_parser, x))
 
+    # cache
+    cache_parser = subparsers.add_parser("cache")
+    cache_parser.set_defaults(func=lambda x: cache(cache_parser, x))
+
     args, other = main_parser.parse_known_args()
     # print(args, other)
     args.func(other)
@@ -0,0 +1,40 @@
+import argparse
+
+from olman_client import api
+
+MIB = 1024 * 1024
+
+
+def cache(parser: argparse.ArgumentParser, args: list[str]):
+    parser.add_argument(
+        "action",
+        nargs="?",
+        choices=["info", "prune", "clear"],
+        default="info",
+    )
+    parser.add_argument(
+        "--max-size",
+        required=False,
+        default=None,
+        type=int,
+        help="Size in MiB to prune the cache down to.",
+    )
+    args = parser.parse_args(args)
+
+    if args.action == "prune":
+        if args.max_size is None:
+            removed = api.cache_prune()
+
+        else:
+            removed = api.cache_prune(args.max_size * MIB)
+
+        print(f"Removed {removed} archives")
+
+    elif args.action == "clear":
+        removed = api.cache_prune(0)
+
+        print(f"Removed {removed} archives")
+
+    else:
+        for k, v in api.cache_info().items():
+            print(f"{k}: {v}")
@@ -1,27 +1,80 @@
 import argparse
+from pathlib import Path
 
 import olman_client
+from olman_client.lockfile import LOCKFILE_NAME
 
-from .utils import ref_split
+from .utils import requirements
 
 
 def install(parser: argparse.ArgumentParser, args: list[str]):
     parser.add_argument(
         "ref",
-        nargs="+",
+        nargs="*",
+        help="Libraries to install. The dependencies of --manifest otherwise.",
+    )
+    parser.add_argument(
+        "-m",
+        "--manifest",
+        required=False,
+        default=olman_client.api.MANIFEST_FILE_NAME,
+        help="Path to the project manifest.",
     )
     parser.add_argument(
         "-f",
         "--force",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        required=False,
+        default=None,
+        type=int,
+        help="Number of parallel downloads.",
+    )
+    parser.add_argument(
+        "--locked",
+        action="store_true",
+        help="Install the libraries of the lockfile, without resolving them.",
+    )
+    parser.add_argument(
+        "--lockfile",
+        required=False,
+        default=LOCKFILE_NAME,
+        help="Path to the lockfile.",
     )
     args = parser.parse_args(args)
 
-    refs = args.ref
+    if args.locked:
+        if args.ref:
+            parser.error("references can not be given with --locked")
+
+        install_locked(Path(args.lockfile), force=args.force, jobs=args.jobs)
+        return
+
+    if not args.ref and not Path(args.manifest).exists():
+        parser.error(f"no references given and no manifest at {args.manifest}")
+
+    # All libraries are resolved together and installed at once
+    olman_client.install_requirements(
+        requirements(args.ref, Path(args.manifest)),
+        force=args.force,
+        jobs=args.jobs,
+    )
+
+
+def install_locked(path: Path, *, force, jobs: int | None):
+    drifted = olman_client.lock_drift(path)
 
-    for ref in refs:
-        name, constraint = ref_split(ref)
+    for name, installed_version, locked_version in drifted:
+        print(f"{name}: {installed_version} is installed, {locked_version} is locked")
 
-        if constraint == "":
-            constraint = ">=0.0.0"
+    if drifted and not force:
+        print(
+            "Installed libraries differ from the lockfile, use --force to replace them"
+        )
+        exit(1)
 
-        olman_client.install(name, constraint, force=args.force)
+    # Drift was just checked
+    olman_client.install_locked(path, force=force, jobs=jobs, check_drift=False)
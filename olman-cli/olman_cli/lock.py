@@ -0,0 +1,46 @@
+import argparse
+from pathlib import Path
+
+from olman_client import api
+from olman_client.lockfile import LOCKFILE_NAME
+
+from .utils import requirements
+
+
+def lock(parser: argparse.ArgumentParser, args: list[str]):
+    parser.add_argument(
+        "ref",
+        nargs="*",
+        help="Libraries to lock. The dependencies of --manifest otherwise.",
+    )
+    parser.add_argument(
+        "-m",
+        "--manifest",
+        required=False,
+        default=api.MANIFEST_FILE_NAME,
+        help="Path to the project manifest.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        required=False,
+        default=LOCKFILE_NAME,
+        help="Path to the lockfile.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        required=False,
+        default=None,
+        type=int,
+        help="Number of parallel downloads.",
+    )
+    args = parser.parse_args(args)
+
+    if not args.ref and not Path(args.manifest).exists():
+        parser.error(f"no references given and no manifest at {args.manifest}")
+
+    locked = requirements(args.ref, Path(args.manifest))
+    api.lock(locked, Path(args.output), jobs=args.jobs)
+
+    print(f"Locked {', '.join(locked)} in {args.output}")
@@ -7,13 +7,20 @@ def remove(parser: argparse.ArgumentParser, args: list[str]):
     parser.add_argument(
         "name",
         nargs="+",
+        help="Library names, or globs matching them.",
+    )
+    parser.add_argument(
+        "-r",
+        "--regex",
+        action="store_true",
+        help="The names are regexes matching whole names.",
     )
     args = parser.parse_args(args)
 
-    names = args.name
+    names = []
 
-    for name in names:
+    for name in args.name:
         print(f"Removing {name}")
-        api.remove(name)
+        names += api.remove(name, regex=args.regex)
 
     print(f"Removed {len(names)} libraries: {names}")
@@ -5,15 +5,65 @@ from olman_client import api
 
 from .utils import ref_split
 
+SEARCH_MODES = ["keyword", "prefix", "fuzzy"]
+
 
 def search(parser: argparse.ArgumentParser, args: list[str]):
     parser.add_argument(
         "ref",
+        nargs="?",
+    )
+    parser.add_argument(
+        "-r",
+        "--regex",
+        action="store_true",
+        help="The ref is a regex matching whole names, without a version constraint.",
+    )
+    parser.add_argument(
+        "-t",
+        "--text",
+        nargs="+",
+        required=False,
+        default=None,
+        help="Search the names, tags, descriptions and authors for these words.",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=SEARCH_MODES,
+        default="keyword",
+        help="How the words of --text are matched.",
+    )
+    parser.add_argument(
+        "-n",
+        "--limit",
+        required=False,
+        default=None,
+        type=int,
+        help="Maximum number of results of --text.",
     )
     args = parser.parse_args(args)
 
+    if args.text is not None:
+        if args.ref is not None:
+            parser.error("ref and --text are mutually exclusive")
+
+        for name, version, short_description in api.search_text(
+            " ".join(args.text), mode=args.mode, limit=args.limit
+        ):
+            print(f"{name} {version}: {short_description}")
+
+        return
+
+    if args.ref is None:
+        parser.error("a ref or --text is required")
+
     ref = args.ref
 
-    name, constraint = ref_split(ref)
+    # Regexes contain the characters of the constraint operators
+    if args.regex:
+        name, constraint = ref, None
+
+    else:
+        name, constraint = ref_split(ref)
 
-    pprint(api.search(name, constraint))
+    pprint(api.search(name, constraint, regex=args.regex))
@@ -1,3 +1,10 @@
+from pathlib import Path
+
+import olman_client
+
+ANY_VERSION = ">=0.0.0"
+
+
 def ref_split(ref: str) -> tuple[str, str]:
     for i, c in enumerate(ref):
         if c in "><^=":
@@ -6,3 +13,30 @@ def ref_split(ref: str) -> tuple[str, str]:
         i += 1
 
     return ref[:i], ref[i:]
+
+
+def requirements(refs: list[str], manifest: Path | None) -> dict[str, str]:
+    """
+    Requirements given as references, or else the dependencies of a manifest.
+    Constraints of a library given several times must all be satisfied.
+    """
+    if not refs:
+        return {
+            name: constraint or ANY_VERSION
+            for name, constraint in olman_client.manifest_dependencies(manifest).items()
+        }
+
+    result = dict()
+    for ref in refs:
+        name, constraint = ref_split(ref)
+
+        if constraint == "":
+            constraint = ANY_VERSION
+
+        if name in result:
+            result[name] = f"{result[name]}, {constraint}"
+
+        else:
+            result[name] = constraint
+
+    return result
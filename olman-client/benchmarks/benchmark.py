@@ -0,0 +1,294 @@
+"""
+Benchmarks of the client's hot paths against synthetic remote indexes.
+
+    python benchmarks/benchmark.py --libraries 1000 10000 --versions 10 --fanout 3
+
+Every library gets `--versions` major versions. Each version depends on up to
+`--fanout` libraries of the same group of `--group-size` libraries, which bounds the
+size of a dependency tree independently of the size of the index.
+
+Results are written as JSON, to stdout or to `--output`.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+DEFAULT_LIBRARIES = [1000, 10000]
+DEFAULT_VERSIONS = 5
+DEFAULT_FANOUT = 3
+DEFAULT_GROUP_SIZE = 50
+DEFAULT_REPEAT = 5
+DEFAULT_LOCAL_LIBRARIES = 100
+
+
+def generate_index(
+    path: Path, libraries: int, versions: int, fanout: int, group_size: int, seed: int
+) -> list[str]:
+    rng = random.Random(seed)
+    names = [f"lib-{i:06d}" for i in range(libraries)]
+
+    records = []
+    for i, name in enumerate(names):
+        group_end = min((i // group_size + 1) * group_size, libraries)
+        dep_candidates = names[i + 1 : group_end]
+
+        for major in range(1, versions + 1):
+            deps = rng.sample(dep_candidates, min(fanout, len(dep_candidates)))
+
+            records.append(
+                {
+                    "download_link": f"https://github.com/olman-bench/{name}/archive/{major}.zip",
+                    "manifest": {
+                        "manifest_version": "0.0.0-alpha",
+                        "library": {
+                            "name": name,
+                            "version": f"{major}.0.0",
+                            "short_description": f"Synthetic library {name}",
+                            "tags": ["benchmark"],
+                        },
+                        "dependencies": {
+                            dep: f">={rng.randint(1, versions)}.0.0" for dep in deps
+                        },
+                        "urls": {
+                            "repository": f"https://github.com/olman-bench/{name}",
+                        },
+                    },
+                }
+            )
+
+    with open(path, "w") as f:
+        json.dump({"libraries": records, "timestamp": time.time()}, f, sort_keys=True)
+
+    return names
+
+
+def measure(func: Callable[[], object], repeat: int, setup=None) -> dict[str, float]:
+    timings = []
+
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "max": max(timings),
+    }
+
+
+def run(args: argparse.Namespace, work_dir: Path) -> list[dict]:
+    # Imported here, so the client's data and cache folders point at `work_dir`
+    from olman_client.graph import DependencyGraph
+    from olman_client.internal import local_index, name_pattern, remote_index
+    from olman_models import Manifest
+
+    results = []
+
+    for libraries in args.libraries:
+        params = {
+            "libraries": libraries,
+            "versions": args.versions,
+            "fanout": args.fanout,
+            "group_size": args.group_size,
+        }
+
+        def record(benchmark: str, timings: dict[str, float], **extra):
+            result = {"benchmark": benchmark, **params, **extra, **timings}
+            results.append(result)
+            print(
+                f"{benchmark:<40} {libraries:>8} libs  median {timings['median']:.6f}s",
+                file=sys.stderr,
+            )
+
+        names = generate_index(
+            remote_index.index_file_path,
+            libraries,
+            args.versions,
+            args.fanout,
+            args.group_size,
+            args.seed,
+        )
+        remote_index.compiled_index_file_path.unlink(missing_ok=True)
+        remote_index._index_cache.invalidate()
+
+        record(
+            "remote_index._load",
+            measure(
+                remote_index._load,
+                args.repeat,
+                setup=remote_index._index_cache.invalidate,
+            ),
+        )
+
+        remote_index._compile()
+        name = names[len(names) // 2]
+
+        record(
+            "remote_index.search (cold)",
+            measure(
+                lambda: remote_index.search(name, ">=1.0.0"),
+                args.repeat,
+                setup=remote_index._index_cache.invalidate,
+            ),
+        )
+        record(
+            "remote_index.search (warm)",
+            measure(lambda: remote_index.search(name, ">=1.0.0"), args.repeat),
+        )
+
+        record(
+            "remote_index.match (glob)",
+            measure(
+                lambda: remote_index.match(name_pattern.compile(f"{name[:-2]}*")),
+                args.repeat,
+            ),
+        )
+
+        for mode in ["keyword", "prefix", "fuzzy"]:
+            query = {"keyword": name, "prefix": name[:-2], "fuzzy": "synthetik"}[mode]
+
+            record(
+                f"remote_index.search_text ({mode})",
+                measure(
+                    lambda: remote_index.search_text(query, mode, limit=10),
+                    args.repeat,
+                ),
+            )
+
+        # First library of a group, it has the largest dependency tree
+        record(
+            "DependencyGraph.fromNameVersion",
+            measure(
+                lambda: DependencyGraph.fromNameVersion(names[0], ">=1.0.0"),
+                args.repeat,
+                setup=remote_index._index_cache.invalidate,
+            ),
+        )
+
+        manifests = [
+            Manifest(**remote_index.get(lib_name, None).manifest.model_dump())
+            for lib_name in names[: args.local_libraries]
+        ]
+
+        def add_all():
+            for manifest in manifests:
+                local_index.add(manifest, work_dir / manifest.library.name)
+
+        def remove_all():
+            for manifest in manifests:
+                local_index.remove(manifest.library.name)
+
+        local_index.index_file_path.unlink(missing_ok=True)
+        record(
+            "local_index.add",
+            measure(add_all, args.repeat, setup=remove_all),
+            operations=len(manifests),
+        )
+
+        remove_all()
+        record(
+            "local_index.remove",
+            measure(remove_all, args.repeat, setup=add_all),
+            operations=len(manifests),
+        )
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser("benchmark")
+
+    parser.add_argument(
+        "-n",
+        "--libraries",
+        nargs="+",
+        type=int,
+        default=DEFAULT_LIBRARIES,
+        help="Number of libraries in the synthetic index. Accepts several sizes.",
+    )
+    parser.add_argument(
+        "--versions",
+        type=int,
+        default=DEFAULT_VERSIONS,
+        help="Number of versions of every library.",
+    )
+    parser.add_argument(
+        "--fanout",
+        type=int,
+        default=DEFAULT_FANOUT,
+        help="Number of dependencies of every version.",
+    )
+    parser.add_argument(
+        "--group-size",
+        type=int,
+        default=DEFAULT_GROUP_SIZE,
+        help="Libraries only depend on libraries of their own group.",
+    )
+    parser.add_argument(
+        "--local-libraries",
+        type=int,
+        default=DEFAULT_LOCAL_LIBRARIES,
+        help="Number of libraries added to and removed from the local index.",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help="Number of timed runs of every benchmark.",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed of the synthetic index generator.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        required=False,
+        default=None,
+        help="Path to output file. Output is printed to STDOUT otherwise.",
+    )
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        work_dir = Path(work_dir)
+
+        for var in ["XDG_DATA_HOME", "XDG_CACHE_HOME", "XDG_STATE_HOME"]:
+            os.environ[var] = str(work_dir / var.lower())
+
+        results = run(args, work_dir)
+
+    report = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    if args.output is None:
+        print(json.dumps(report, indent=2))
+
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
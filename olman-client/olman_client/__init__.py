@@ -1 +1,15 @@
-from .api import info, install, remove, search, update
+from .api import (
+    cache_info,
+    cache_prune,
+    info,
+    install,
+    install_locked,
+    install_requirements,
+    lock,
+    lock_drift,
+    manifest_dependencies,
+    remove,
+    search,
+    search_text,
+    update,
+)
@@ -1,7 +1,18 @@
 import shutil
+import tomllib
+from pathlib import Path
 
-from olman_client import graph, install_manager
-from olman_client.internal import local_index, remote_index
+from olman_models import Manifest
+
+from olman_client import graph, install_manager, lockfile
+from olman_client.internal import (
+    archive_cache,
+    local_index,
+    name_pattern,
+    remote_index,
+)
+
+MANIFEST_FILE_NAME = "manifest.toml"
 
 
 def update(force: bool = False) -> bool:
@@ -10,38 +21,150 @@ def update(force: bool = False) -> bool:
     return remote_index.update(force=force)
 
 
-def install(name: str, version: str | None = None, *, force: bool = False) -> bool:
+def install(
+    name: str,
+    version: str | None = None,
+    *,
+    force: bool = False,
+    jobs: int | None = None,
+):
     "Install a library."
 
     dep_graph = graph.DependencyGraph.fromNameVersion(name, version)
 
-    for lib_name, lib_version in dep_graph.as_list():
-        install_manager.install(lib_name, lib_version, force=force)
+    install_manager.install_all(dep_graph.as_list(), force=force, jobs=jobs)
+
+
+def install_requirements(
+    requirements: dict[str, str | None],
+    *,
+    force: bool = False,
+    jobs: int | None = None,
+):
+    "Install several libraries, resolved together."
+
+    dep_graph = graph.DependencyGraph.fromRequirements(requirements)
+
+    install_manager.install_all(dep_graph.as_list(), force=force, jobs=jobs)
+
+
+def manifest_dependencies(path: Path = Path(MANIFEST_FILE_NAME)) -> dict[str, str]:
+    "Get the dependencies of a project's manifest."
+
+    with open(path, "rb") as f:
+        manifest = Manifest(**tomllib.load(f))
+
+    return manifest.dependencies
+
+
+def lock(
+    requirements: dict[str, str | None],
+    path: Path = Path(lockfile.LOCKFILE_NAME),
+    *,
+    jobs: int | None = None,
+):
+    "Resolve libraries and pin them, with the hash of their archive, in a lockfile."
+
+    dep_graph = graph.DependencyGraph.fromRequirements(requirements)
+
+    lockfile.write(path, lockfile.lock(requirements, dep_graph.as_list(), jobs=jobs))
+
+
+def lock_drift(path: Path = Path(lockfile.LOCKFILE_NAME)) -> list[tuple[str, str, str]]:
+    "Get locked libraries installed with another version: (name, installed, locked)"
+
+    return lockfile.drift(lockfile.read(path))
+
+
+def install_locked(
+    path: Path = Path(lockfile.LOCKFILE_NAME),
+    *,
+    force: bool = False,
+    jobs: int | None = None,
+    check_drift: bool = True,
+):
+    """
+    Install the libraries of a lockfile, without resolving them again.
+
+    Unless `force` is set, fails if libraries are installed with another version than
+    the locked one. `check_drift` skips that check, for callers that already did it.
+    """
 
+    locked = lockfile.read(path)
 
-def remove(name: str) -> bool:
-    "Remove an installed library. Supports regex and/or glob?"
-    lib = local_index.get(name)
+    if not force and check_drift and (drifted := lockfile.drift(locked)):
+        raise Exception(
+            "Installed libraries differ from the lockfile: "
+            + ", ".join(
+                f"{name} (installed {installed_version}, locked {locked_version})"
+                for name, installed_version, locked_version in drifted
+            )
+        )
 
-    shutil.rmtree(lib.location)
-    # TODO: remove dependencies too?
-    # TODO: track and check if used by another library
+    install_manager.install_all(locked.libraries, force=force, jobs=jobs)
 
-    local_index.remove(name)
+
+def _names(index, name: str, regex: bool) -> list[str]:
+    "Names of `index` matching `name`, if it is a glob or a regex"
+    if regex or name_pattern.is_glob(name):
+        return index.match(name_pattern.compile(name, regex=regex))
+
+    return [name]
+
+
+def remove(name: str, *, regex: bool = False) -> list[str]:
+    """
+    Remove installed libraries. `name` may be a glob, or a regex if `regex` is set.
+    Returns the names of the removed libraries.
+    """
+    names = _names(local_index, name, regex)
+
+    for lib_name in names:
+        lib = local_index.get(lib_name)
+
+        shutil.rmtree(lib.location)
+        # TODO: remove dependencies too?
+        # TODO: track and check if used by another library
+
+        local_index.remove(lib_name)
+
+    return names
 
 
 # TODO: implement "list" to return all versions of a library
 
 
-def search(name: str, constraint: str | None = None) -> list[tuple[str, str]]:
-    "Search for libraries in the index. Supports regex and/or glob?"
-    matches = remote_index.search(name, constraint)
+def search(
+    name: str, constraint: str | None = None, *, regex: bool = False
+) -> list[tuple[str, str]]:
+    """
+    Search for libraries in the index. `name` may be a glob, or a regex if `regex` is
+    set. Patterns match whole names.
+    """
+    matches = [
+        remote_lib
+        for lib_name in _names(remote_index, name, regex)
+        for remote_lib in remote_index.search(lib_name, constraint)
+    ]
 
     return [
         (lib.manifest.library.name, lib.manifest.library.version) for lib in matches
     ]
 
 
+def search_text(
+    query: str, *, mode: str = "keyword", limit: int | None = None
+) -> list[tuple[str, str, str]]:
+    """
+    Search for libraries by the words of their name, tags, descriptions and authors.
+
+    `mode` is "keyword" for whole words, "prefix" for words starting with the query's,
+    or "fuzzy" to also match misspelled words. Returns the name, latest version and
+    short description of the matches, best match first.
+    """
+    return remote_index.search_text(query, mode, limit)
+
+
 def info(name: str, version: str | None = None) -> dict[str, str]:
     "Get library information"
     remote_lib = remote_index.get(name, version)
@@ -53,3 +176,20 @@ def info(name: str, version: str | None = None) -> dict[str, str]:
         "short_description": short_description,
         "long_description": long_description,
     }
+
+
+def cache_info() -> dict[str, str | int]:
+    "Get information about the archive cache"
+    archives = archive_cache.entries()
+
+    return {
+        "location": archive_cache.cache_dir.as_posix(),
+        "archives": len(archives),
+        "size": sum(stat.st_size for _, stat in archives),
+        "max_size": archive_cache.MAX_SIZE,
+    }
+
+
+def cache_prune(max_size: int = archive_cache.MAX_SIZE) -> int:
+    "Remove the least recently used archives until the cache fits in `max_size` bytes"
+    return len(archive_cache.prune(max_size))
@@ -1,44 +1,167 @@
-from shutil import rmtree
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from shutil import move, rmtree
 
-from olman_vcs_utils import downloadFile
+from olman_models import LockedLibrary, Manifest, RemoteLibrary
 from olman_version_utils import version_eq
 
 from olman_client import utils
 from olman_client.files.platform import getDataDir
-from olman_client.internal import local_index, remote_index
+from olman_client.internal import archive_cache, local_index
 
-DOWNLOAD_LOCATION = getDataDir()
 INSTALL_LOCATION = getDataDir()
+MAX_PARALLEL_DOWNLOADS = 8
+STAGING_PREFIX = ".staging-"
+STAGING_REPLACED_DIR_NAME = ".replaced"
 
 
-def install(name: str, version_exact: str, *, force=False, reinstall=False):
-    # remote_index.update()
+def _prepare(
+    remote_lib: RemoteLibrary, *, force=False, reinstall=False
+) -> RemoteLibrary | None:
+    """
+    Check that `remote_lib` can be installed. Returns None if this version is already
+    installed. Versions it replaces are only removed by `_commit`.
+    """
+    name = remote_lib.manifest.library.name
+    version_exact = remote_lib.manifest.library.version
 
     if local_lib := local_index.get(name, default=None):
         if version_eq(local_lib.manifest.library.version, version_exact):
-            if reinstall:
-                remove(name)
-
-            else:
+            if not reinstall:
                 print(f"{name}:{version_exact} is already installed")
-                return
-
-        elif force:
-            remove(name)
+                return None
 
-        else:
+        elif not force:
             raise Exception("Another version is already installed")
 
-    remote_lib = remote_index.get(name, version_exact, default=None)
+    return remote_lib
+
+
+def _download(remote_lib: RemoteLibrary) -> Path:
+    # Locked libraries must match the archive they were locked to
+    if isinstance(remote_lib, LockedLibrary):
+        return archive_cache.fetch(remote_lib.download_link, sha256=remote_lib.sha256)
+
+    return archive_cache.fetch(remote_lib.download_link)
+
+
+def _extract(
+    remote_lib: RemoteLibrary, compressed_lib_path: Path, staging_dir: Path
+) -> Path:
+    # A folder per library, archives may have the same top-level folder
+    return utils.extractFile(
+        compressed_lib_path,
+        dst_dir=staging_dir / remote_lib.manifest.library.name,
+    )
+
+
+def _commit(staged: list[tuple[RemoteLibrary, Path]], staging_dir: Path):
+    """
+    Move the staged libraries in place of the versions they replace, and update the
+    index in a single transaction. On failure, everything is moved back.
+
+    Replaced versions are moved into `staging_dir`, and deleted along with it.
+    """
+    replaced_dir = staging_dir / STAGING_REPLACED_DIR_NAME
+    replaced_dir.mkdir()
+
+    moved: list[tuple[Path, Path]] = []
+    entries: list[tuple[Manifest, Path]] = []
+
+    try:
+        for remote_lib, staged_path in staged:
+            name = remote_lib.manifest.library.name
+            lib_path = INSTALL_LOCATION / name
+
+            if local_lib := local_index.get(name, default=None):
+                location = Path(local_lib.location)
+
+                if location.exists():
+                    move(location, replaced_dir / name)
+                    moved.append((location, replaced_dir / name))
+
+            if lib_path.exists():
+                raise Exception(f"{lib_path} already exists")
+
+            move(staged_path, lib_path)
+            moved.append((staged_path, lib_path))
+
+            entries.append((remote_lib.manifest, lib_path.absolute()))
+
+        local_index.add_all(entries, replace=True)
+
+    except BaseException:
+        for src, dst in reversed(moved):
+            move(dst, src)
+
+        raise
+
+
+def install_all(
+    libs: list[RemoteLibrary],
+    *,
+    force=False,
+    reinstall=False,
+    jobs: int | None = None,
+):
+    """
+    Install several libraries at once. Archives are downloaded concurrently and each
+    one is extracted to a staging folder as soon as it arrives. Installed versions are
+    only replaced, and the local index updated, once all libraries are extracted.
+
+    `libs` are used as they are, e.g. the resolved `DependencyGraph.as_list()`, the
+    index is not looked up again.
+    """
+    remote_libs = [
+        remote_lib
+        for lib in libs
+        if (remote_lib := _prepare(lib, force=force, reinstall=reinstall)) is not None
+    ]
+
+    if not remote_libs:
+        return
+
+    INSTALL_LOCATION.mkdir(parents=True, exist_ok=True)
+
+    # Deleted with whatever is left in it, also when anything fails
+    with tempfile.TemporaryDirectory(
+        prefix=STAGING_PREFIX, dir=INSTALL_LOCATION
+    ) as staging_dir:
+        staging_dir = Path(staging_dir)
+        staged: list[tuple[RemoteLibrary, Path]] = []
+
+        with ThreadPoolExecutor(jobs or MAX_PARALLEL_DOWNLOADS) as executor:
+            futures = {
+                executor.submit(_download, remote_lib): remote_lib
+                for remote_lib in remote_libs
+            }
+
+            try:
+                for future in as_completed(futures):
+                    remote_lib = futures[future]
+                    library = remote_lib.manifest.library
+                    compressed_lib_path = future.result()
+                    print(f"Downloaded {library.name}:{library.version}")
+
+                    staged.append(
+                        (
+                            remote_lib,
+                            _extract(remote_lib, compressed_lib_path, staging_dir),
+                        )
+                    )
+                    print(f"Extracted {library.name}:{library.version}")
+
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+
+                raise
 
-    if remote_lib is None:
-        raise Exception(f"Could not find {name}:{version_exact} in the index")
+        _commit(staged, staging_dir)
 
-    compressed_lib_path = downloadFile(remote_lib.download_link, dst=DOWNLOAD_LOCATION)
-    lib_path = utils.extractFile(compressed_lib_path, dst_dir=INSTALL_LOCATION)
-    lib_path = lib_path.rename(lib_path.with_name(name))
-    compressed_lib_path.unlink()
-    local_index.add(remote_lib.manifest, lib_path.absolute())
+    # Only once every archive is extracted
+    archive_cache.prune()
 
 
 def remove(name: str, missing_ok: bool = True):
@@ -0,0 +1,94 @@
+import hashlib
+import os
+from pathlib import Path
+from urllib.parse import urlparse
+
+from olman_vcs_utils import downloadFileWithDigest
+
+from olman_client.files import platform
+
+ARCHIVE_CACHE_DIR_NAME = "archives"
+MAX_SIZE = 512 * 1024 * 1024  # 512 MiB
+
+
+cache_dir = platform.getCacheDir() / ARCHIVE_CACHE_DIR_NAME
+
+
+def _path(download_link: str) -> Path:
+    # Download links pin a commit, so the link identifies the content
+    key = hashlib.sha256(download_link.encode()).hexdigest()
+    suffix = Path(urlparse(download_link).path).suffix
+
+    return cache_dir / f"{key}{suffix}"
+
+
+def get(download_link: str) -> Path | None:
+    path = _path(download_link)
+
+    if not path.is_file():
+        return None
+
+    # The modification time tracks the last use, see `prune`
+    path.touch()
+
+    return path
+
+
+def digest(path: Path) -> str:
+    "SHA-256 hex digest of a file"
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def fetch(download_link: str, *, sha256: str | None = None) -> Path:
+    """
+    Path of the cached archive of `download_link`, downloading it if necessary.
+
+    If `sha256` is given, a cached archive which does not match it is
+    downloaded again, and a download which does not match it raises a `ValueError`.
+
+    The cache is not pruned here, as concurrent fetches could evict each other's
+    archives before they are used: callers `prune` once they are done with them.
+    """
+    if path := get(download_link):
+        if sha256 is None or digest(path) == sha256:
+            return path
+
+        path.unlink(missing_ok=True)
+
+    path, _ = downloadFileWithDigest(
+        download_link, dst=_path(download_link), exist_ok=True, sha256=sha256
+    )
+
+    return path
+
+
+def entries() -> list[tuple[Path, os.stat_result]]:
+    "Cached archives, least recently used first"
+    if not cache_dir.exists():
+        return []
+
+    archives = [
+        (path, path.stat())
+        for path in cache_dir.iterdir()
+        if path.is_file() and path.suffix != ".part"
+    ]
+
+    return sorted(archives, key=lambda archive: archive[1].st_mtime)
+
+
+def prune(max_size: int = MAX_SIZE) -> list[Path]:
+    "Remove the least recently used archives until the cache fits in `max_size` bytes."
+    archives = entries()
+    size = sum(stat.st_size for _, stat in archives)
+
+    removed = []
+    for path, stat in archives:
+        if size <= max_size:
+            break
+
+        path.unlink(missing_ok=True)
+        size -= stat.st_size
+        removed.append(path)
+
+    return removed
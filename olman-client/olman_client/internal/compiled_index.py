@@ -0,0 +1,149 @@
+"""
+Binary, memory-mapped companion of the remote index.
+
+Layout (little endian):
+
+    header   magic, format version, key of the source JSON file, number of libraries
+    records  one fixed-size record per library name, sorted by name:
+             name offset, name length, blob offset, blob length
+    names    UTF-8 encoded library names
+    blobs    per library, the JSON encoded list of its index entries
+
+Records have a fixed size, so a name is found with a binary search over the mapped
+file and only the blob of that name is decoded.
+"""
+
+import json
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Iterator
+
+MAGIC = b"OLMI"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<4sHQQqI")
+_RECORD = struct.Struct("<QHQI")
+
+type T_SourceKey = tuple[int, int, int]
+
+
+def write(
+    path: Path, source_key: T_SourceKey, libraries: dict[str, list[dict[str, Any]]]
+):
+    names = sorted(name.encode() for name in libraries)
+    blobs = [
+        json.dumps(libraries[name.decode()], separators=(",", ":")).encode()
+        for name in names
+    ]
+
+    names_offset = _HEADER.size + _RECORD.size * len(names)
+    blobs_offset = names_offset + sum(len(name) for name in names)
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, *source_key, len(names))
+
+    records = []
+    name_offset, blob_offset = names_offset, blobs_offset
+    for name, blob in zip(names, blobs):
+        records.append(_RECORD.pack(name_offset, len(name), blob_offset, len(blob)))
+        name_offset += len(name)
+        blob_offset += len(blob)
+
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.writelines(records)
+        f.writelines(names)
+        f.writelines(blobs)
+
+    os.replace(tmp_path, path)
+
+
+class _Names:
+    "Lazy, bisectable view of the sorted names of a `CompiledIndex`"
+
+    def __init__(self, index: "CompiledIndex") -> None:
+        self._index = index
+
+    def __len__(self) -> int:
+        return self._index._count
+
+    def __getitem__(self, i: int) -> bytes:
+        name_offset, name_len, _, _ = self._index._record(i)
+
+        return self._index._buffer[name_offset : name_offset + name_len]
+
+
+class CompiledIndex:
+    source_key: T_SourceKey
+
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._buffer) < _HEADER.size:
+            self.close()
+            raise ValueError(f"Invalid compiled index: {path}")
+
+        magic, format_version, *source_key, self._count = _HEADER.unpack_from(
+            self._buffer
+        )
+
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Invalid compiled index: {path}")
+
+        self.source_key = tuple(source_key)
+        self._names = _Names(self)
+
+    def close(self) -> None:
+        self._buffer.close()
+
+    def _record(self, i: int) -> tuple[int, int, int, int]:
+        return _RECORD.unpack_from(self._buffer, _HEADER.size + _RECORD.size * i)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, name: str) -> bool:
+        return self._find(name) is not None
+
+    def _find(self, name: str) -> int | None:
+        name_b = name.encode()
+        i = bisect_left(self._names, name_b)
+
+        if i < self._count and self._names[i] == name_b:
+            return i
+
+        return None
+
+    def names(self, prefix: str = "") -> Iterator[str]:
+        "Sorted names starting with `prefix`"
+        # UTF-8 preserves the order of code points, names with a prefix are contiguous
+        prefix_b = prefix.encode()
+
+        i = bisect_left(self._names, prefix_b)
+        while i < self._count and (name := self._names[i]).startswith(prefix_b):
+            yield name.decode()
+            i += 1
+
+    def get(self, name: str) -> list[dict[str, Any]] | None:
+        i = self._find(name)
+
+        if i is None:
+            return None
+
+        _, _, blob_offset, blob_len = self._record(i)
+
+        return json.loads(self._buffer[blob_offset : blob_offset + blob_len])
+
+
+def load(path: Path) -> CompiledIndex | None:
+    "Open a compiled index, or return None if it is missing or unreadable."
+    try:
+        return CompiledIndex(path)
+
+    except (OSError, ValueError, struct.error):
+        return None
@@ -1,73 +1,117 @@
 import json
-from collections import defaultdict
+import sqlite3
+from contextlib import closing, contextmanager
+from itertools import takewhile
 from pathlib import Path
 from time import time
-from typing import Any
+from typing import Any, Iterator
 
 from olman_models import LocalLibrary, Manifest
 from olman_version_utils import version_filter
 
-from olman_client import utils
 from olman_client.files import platform
+from olman_client.internal import name_pattern
 
-INDEX_FILE_NAME = "local_index.json"
+INDEX_FILE_NAME = "local_index.sqlite3"
+LEGACY_INDEX_FILE_NAME = "local_index.json"
+SCHEMA_VERSION = 1
+
+# Seconds to wait for another process to release the index
+LOCK_TIMEOUT = 30
 
 
 index_file_path = platform.getDataDir() / INDEX_FILE_NAME
+legacy_index_file_path = platform.getDataDir() / LEGACY_INDEX_FILE_NAME
 
 
 class _sentinel:
     pass
 
 
-def _initialize(exist_ok=False):
-    if not exist_ok and index_file_path.exists():
-        raise FileExistsError("Local index already exists")
-
+def _connect() -> sqlite3.Connection:
     index_file_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(index_file_path, "w") as f:
-        json.dump({"libraries": []}, f)
 
+    # Transactions are managed explicitly, see `_transaction`
+    connection = sqlite3.connect(
+        index_file_path, timeout=LOCK_TIMEOUT, isolation_level=None
+    )
+
+    if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        _initialize(connection)
+
+    if legacy_index_file_path.exists():
+        _migrate(connection)
+
+    return connection
+
+
+@contextmanager
+def _transaction() -> Iterator[sqlite3.Connection]:
+    "Write transaction, committed at once when the block exits without an error"
+    with closing(_connect()) as connection:
+        # Takes the write lock immediately, concurrent writers wait for each other
+        connection.execute("BEGIN IMMEDIATE")
 
-def _load() -> defaultdict[str, list[LocalLibrary]]:
-    if not index_file_path.exists():
-        _initialize()
+        try:
+            yield connection
 
-    with open(index_file_path, "r") as f:
-        data = json.load(f)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
 
-    libraries = [LocalLibrary(**local_lib) for local_lib in data["libraries"]]
+        connection.execute("COMMIT")
 
-    libraries = utils.bucket(
-        libraries,
-        key=lambda local_lib: local_lib.manifest.library.name,
+
+def _initialize(connection: sqlite3.Connection):
+    connection.execute("BEGIN IMMEDIATE")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS libraries"
+        " (name TEXT PRIMARY KEY, library TEXT NOT NULL)"
     )
+    connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    connection.execute("COMMIT")
 
-    for v in libraries.values():
-        if len(v) > 1:
-            raise Exception("Local index is corrupted")
 
-    return libraries
+def _migrate(connection: sqlite3.Connection):
+    "Import the libraries of the JSON index used by older versions"
+    connection.execute("BEGIN IMMEDIATE")
 
+    try:
+        # Another process may have migrated it while this one waited for the lock
+        if legacy_index_file_path.exists():
+            with open(legacy_index_file_path, "r") as f:
+                data = json.load(f)
 
-def _dump(libraries: defaultdict[str, list[LocalLibrary]]):
-    with open(index_file_path, "w") as f:
-        json.dump(
-            {
-                "libraries": [
-                    local_libs[0].model_dump() for local_libs in libraries.values()
-                ]
-            },
-            f,
-        )
+            local_libs = [LocalLibrary(**local_lib) for local_lib in data["libraries"]]
 
+            # Replace, in case an interrupted migration already imported some
+            connection.executemany(
+                "INSERT OR REPLACE INTO libraries (name, library) VALUES (?, ?)",
+                [
+                    (local_lib.manifest.library.name, local_lib.model_dump_json())
+                    for local_lib in local_libs
+                ],
+            )
+
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+
+    connection.execute("COMMIT")
+
+    legacy_index_file_path.replace(
+        legacy_index_file_path.with_name(f"{LEGACY_INDEX_FILE_NAME}.migrated")
+    )
 
-def add(manifest: Manifest, location: Path):
-    libraries = _load()
 
+def _insert(
+    connection: sqlite3.Connection,
+    manifest: Manifest,
+    location: Path,
+    *,
+    replace: bool = False,
+):
     name = manifest.library.name
-    if len(libraries[name]) > 0:
-        raise Exception(f"{name} already exists and can not be added again")
 
     new_lib = LocalLibrary(
         manifest=manifest,
@@ -75,41 +119,78 @@ def add(manifest: Manifest, location: Path):
         date_added=time(),
     )
 
-    libraries[name].append(new_lib)
+    try:
+        connection.execute(
+            f"INSERT {'OR REPLACE ' if replace else ''}INTO libraries (name, library)"
+            " VALUES (?, ?)",
+            (name, new_lib.model_dump_json()),
+        )
 
-    _dump(libraries)
+    except sqlite3.IntegrityError:
+        raise Exception(f"{name} already exists and can not be added again")
 
 
-def remove(name: str):
-    libraries = _load()
+def add(manifest: Manifest, location: Path):
+    with _transaction() as connection:
+        _insert(connection, manifest, location)
 
-    libraries.pop(name, None)
 
-    _dump(libraries)
+def add_all(entries: list[tuple[Manifest, Path]], *, replace: bool = False):
+    """
+    Add several libraries in a single transaction, all of them or none.
 
+    With `replace`, installed libraries of the same names are replaced in the same
+    transaction, so the index never lacks either version.
+    """
+    with _transaction() as connection:
+        for manifest, location in entries:
+            _insert(connection, manifest, location, replace=replace)
 
-def get(name: str, *, default: Any = _sentinel) -> LocalLibrary:
-    libraries = _load()
 
-    matches = libraries[name]
+def remove(name: str):
+    with _transaction() as connection:
+        connection.execute("DELETE FROM libraries WHERE name = ?", (name,))
+
 
-    if len(matches) == 0:
+def get(name: str, *, default: Any = _sentinel) -> LocalLibrary:
+    with closing(_connect()) as connection:
+        row = connection.execute(
+            "SELECT library FROM libraries WHERE name = ?", (name,)
+        ).fetchone()
+
+    if row is None:
         if default is _sentinel:
             raise Exception(f"No installed library named {name}")
         else:
             return default
 
     else:
-        return matches[0]
+        return LocalLibrary.model_validate_json(row[0])
+
+
+def match(pattern: name_pattern.NamePattern) -> list[str]:
+    "Sorted names of the installed libraries matching `pattern`"
+    with closing(_connect()) as connection:
+        # Walks the primary key from the prefix on, and stops past the last name
+        #   starting with it
+        rows = connection.execute(
+            "SELECT name FROM libraries WHERE name >= ? ORDER BY name",
+            (pattern.prefix,),
+        )
+        names = takewhile(
+            lambda name: name.startswith(pattern.prefix), (row[0] for row in rows)
+        )
+
+        return [name for name in names if pattern.matches(name)]
 
 
 def search(name: str, constraint: str) -> list[LocalLibrary]:
-    libraries = _load()
+    local_lib = get(name, default=None)
 
-    if name not in libraries:
+    if local_lib is None:
         return []
 
-    available_versions = libraries[name]
+    available_versions = [local_lib]
     filtered_versions = [
         x
         for x in version_filter(
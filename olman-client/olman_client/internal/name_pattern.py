@@ -0,0 +1,69 @@
+"""
+Glob and regex patterns over library names.
+
+A pattern matches whole names, and is compiled once along with its literal prefix:
+the characters every matching name starts with. Indexes sorted by name only test the
+pattern against the names starting with the prefix, found with a binary search.
+"""
+
+import fnmatch
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+PATTERN_CACHE_SIZE = 256
+
+GLOB_CHARS = "*?["
+REGEX_CHARS = ".^$*+?{}[]\\|()"
+REGEX_QUANTIFIERS = "*+?{"
+
+
+class NamePattern(NamedTuple):
+    pattern: str
+    prefix: str
+    regex: re.Pattern
+
+    def matches(self, name: str) -> bool:
+        return self.regex.fullmatch(name) is not None
+
+
+def is_glob(name: str) -> bool:
+    return any(c in GLOB_CHARS for c in name)
+
+
+def _glob_prefix(pattern: str) -> str:
+    for i, c in enumerate(pattern):
+        if c in GLOB_CHARS:
+            return pattern[:i]
+
+    return pattern
+
+
+def _regex_prefix(pattern: str) -> str:
+    # An alternative may start with anything
+    if "|" in pattern:
+        return ""
+
+    pattern = pattern.removeprefix("^")
+
+    for i, c in enumerate(pattern):
+        if c in REGEX_CHARS:
+            # The last character is optional or repeated, e.g. "ab*", and a
+            #   quantifier at the start is taken literally, e.g. "{a.c"
+            if c in REGEX_QUANTIFIERS:
+                return pattern[: max(i - 1, 0)]
+
+            return pattern[:i]
+
+    return pattern
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compile(pattern: str, *, regex: bool = False) -> NamePattern:
+    "Compile a glob, or a regex if `regex` is set. Raises `re.error` if it is invalid."
+    if regex:
+        return NamePattern(pattern, _regex_prefix(pattern), re.compile(pattern))
+
+    return NamePattern(
+        pattern, _glob_prefix(pattern), re.compile(fnmatch.translate(pattern))
+    )
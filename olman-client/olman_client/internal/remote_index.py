@@ -1,41 +1,245 @@
+import gzip
 import json
+import os
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
+from http import HTTPStatus
+from shutil import copyfileobj
 from time import time
 from typing import Any
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
 
+from libversion import Version
 from olman_models import RemoteLibrary
-from olman_vcs_utils import downloadFile
-from olman_version_utils import version_eq, version_filter
+from olman_version_utils import VersionRange, version_key, version_range
 
 from olman_client import state, utils
 from olman_client.files import platform
+from olman_client.internal import compiled_index, name_pattern, search_index
 
 INDEX_FILE_NAME = "remote_index.json"
+COMPILED_INDEX_FILE_NAME = "remote_index.olmi"
+SEARCH_INDEX_FILE_NAME = "remote_index.terms.json"
 INDEX_FILE_LINK = f"https://raw.githubusercontent.com/openscad/openscad-library-manager/main/output_files/{INDEX_FILE_NAME}"
+INDEX_FILE_GZ_LINK = f"{INDEX_FILE_LINK}.gz"
 
 
 index_file_path = platform.getDataDir() / INDEX_FILE_NAME
+compiled_index_file_path = platform.getDataDir() / COMPILED_INDEX_FILE_NAME
+search_index_file_path = platform.getDataDir() / SEARCH_INDEX_FILE_NAME
 
 
 class _sentinel:
     pass
 
 
-def _download():
+type T_FileKey = tuple[int, int, int]
+
+
+class _Versions:
+    "Versions of a library, parsed once and sorted in ascending order"
+
+    keys: list[Version]
+    libraries: list[RemoteLibrary]
+
+    def __init__(self, libraries: list[RemoteLibrary]) -> None:
+        # Stable sort, so equal versions keep their index order
+        self.libraries = sorted(
+            libraries,
+            key=lambda remote_lib: version_key(remote_lib.manifest.library.version),
+        )
+        self.keys = [
+            version_key(remote_lib.manifest.library.version)
+            for remote_lib in self.libraries
+        ]
+
+    def span(self, version_range: VersionRange) -> tuple[int, int]:
+        "Slice of `libraries` whose versions are in `version_range`"
+        lo, hi = 0, len(self.keys)
+
+        if version_range.lower is not None:
+            if version_range.lower_inclusive:
+                lo = bisect_left(self.keys, version_range.lower)
+
+            else:
+                lo = bisect_right(self.keys, version_range.lower)
+
+        if version_range.upper is not None:
+            if version_range.upper_inclusive:
+                hi = bisect_right(self.keys, version_range.upper)
+
+            else:
+                hi = bisect_left(self.keys, version_range.upper)
+
+        return lo, max(lo, hi)
+
+
+class _IndexCache:
+    """
+    Parsed remote index, kept for the lifetime of the process.
+
+    The cache is keyed by the inode, size and modification time of the index file, so
+    it is only reloaded when the file is replaced (see `update`). Single libraries are
+    decoded on demand from the compiled index; `complete` is set once the whole JSON
+    index has been loaded. The search index is only loaded by text searches.
+    """
+
+    key: T_FileKey | None
+    libraries: defaultdict[str, list[RemoteLibrary]]
+    versions: dict[str, _Versions]
+    compiled: compiled_index.CompiledIndex | None
+    terms: search_index.SearchIndex | None
+    complete: bool
+
+    def __init__(self) -> None:
+        self.compiled = None
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        if self.compiled is not None:
+            self.compiled.close()
+
+        self.key = None
+        self.libraries = defaultdict(list)
+        self.versions = dict()
+        self.compiled = None
+        self.terms = None
+        self.complete = False
+
+
+_index_cache = _IndexCache()
+
+
+def _file_key() -> T_FileKey:
+    stat = index_file_path.stat()
+
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def _request(link: str) -> Request:
+    headers = {}
+
+    # Validators are only meaningful for the file they were received with
+    if index_file_path.exists() and state.State.get("remote-index-link") == link:
+        if etag := state.State.get("remote-index-etag"):
+            headers["If-None-Match"] = etag
+
+        if last_modified := state.State.get("remote-index-last-modified"):
+            headers["If-Modified-Since"] = last_modified
+
+    return Request(link, headers=headers)
+
+
+def _download() -> bool:
+    "Download the index if it changed on the server. Returns False if it did not."
     index_file_path.parent.mkdir(parents=True, exist_ok=True)
 
-    downloadFile(
-        url=INDEX_FILE_LINK,
-        dst=index_file_path,
-        exist_ok=True,
+    # The compressed index is optional, fall back to the plain one if it's missing
+    links = [INDEX_FILE_GZ_LINK, INDEX_FILE_LINK]
+
+    for link in links:
+        try:
+            response = urlopen(_request(link))
+
+        except HTTPError as e:
+            if e.code == HTTPStatus.NOT_MODIFIED:
+                return False
+
+            elif e.code == HTTPStatus.NOT_FOUND and link != links[-1]:
+                continue
+
+            raise
+
+        break
+
+    # Download next to the index and swap it in, so the index is never half-written
+    # and its file key always changes.
+    tmp_path = index_file_path.with_name(index_file_path.name + ".tmp")
+    try:
+        with response, open(tmp_path, "wb") as f:
+            if link.endswith(".gz"):
+                with gzip.GzipFile(fileobj=response) as f_gz:
+                    copyfileobj(f_gz, f)
+
+            else:
+                copyfileobj(response, f)
+
+        os.replace(tmp_path, index_file_path)
+
+    finally:
+        # Only left if the download failed
+        tmp_path.unlink(missing_ok=True)
+
+    state.State.set("remote-index-link", link)
+    state.State.set("remote-index-etag", response.headers.get("ETag"))
+    state.State.set("remote-index-last-modified", response.headers.get("Last-Modified"))
+
+    _index_cache.invalidate()
+
+    return True
+
+
+def _compile():
+    with open(index_file_path, "r") as f:
+        data = json.load(f)
+
+    key = _file_key()
+    libraries = utils.bucket(
+        data["libraries"],
+        key=lambda remote_lib: remote_lib["manifest"]["library"]["name"],
     )
 
+    compiled_index.write(compiled_index_file_path, key, libraries)
+    search_index.write(search_index_file_path, key, libraries)
 
-def _load() -> defaultdict[str, list[RemoteLibrary]]:
+
+def _refresh():
     if not index_file_path.exists():
         raise FileNotFoundError("Remote index doesn't exist. Did you update first?")
         # update()
 
+    key = _file_key()
+    if _index_cache.key != key:
+        _index_cache.invalidate()
+        _index_cache.key = key
+
+
+def _compiled() -> compiled_index.CompiledIndex:
+    if _index_cache.compiled is None:
+        compiled = compiled_index.load(compiled_index_file_path)
+
+        if compiled is None or compiled.source_key != _index_cache.key:
+            if compiled is not None:
+                compiled.close()
+
+            _compile()
+            compiled = compiled_index.CompiledIndex(compiled_index_file_path)
+
+        _index_cache.compiled = compiled
+
+    return _index_cache.compiled
+
+
+def _search_index() -> search_index.SearchIndex:
+    if _index_cache.terms is None:
+        terms = search_index.load(search_index_file_path)
+
+        if terms is None or terms.source_key != _index_cache.key:
+            _compile()
+            terms = search_index.SearchIndex(search_index_file_path)
+
+        _index_cache.terms = terms
+
+    return _index_cache.terms
+
+
+def _load() -> defaultdict[str, list[RemoteLibrary]]:
+    _refresh()
+
+    if _index_cache.complete:
+        return _index_cache.libraries
+
     with open(index_file_path, "r") as f:
         data = json.load(f)
 
@@ -46,20 +250,50 @@ def _load() -> defaultdict[str, list[RemoteLibrary]]:
         key=lambda remote_lib: remote_lib.manifest.library.name,
     )
 
+    _index_cache.libraries = _libraries
+    _index_cache.complete = True
+
     return _libraries
 
 
+def _load_library(name: str) -> list[RemoteLibrary]:
+    _refresh()
+
+    if _index_cache.complete or name in _index_cache.libraries:
+        return _index_cache.libraries.get(name, [])
+
+    entries = _compiled().get(name) or []
+    libraries = [RemoteLibrary(**remote_lib) for remote_lib in entries]
+
+    _index_cache.libraries[name] = libraries
+
+    return libraries
+
+
+def _load_versions(name: str) -> _Versions:
+    _refresh()
+
+    if name not in _index_cache.versions:
+        _index_cache.versions[name] = _Versions(_load_library(name))
+
+    return _index_cache.versions[name]
+
+
 def update(force: bool = False) -> bool:
     threshold = 4 * 3600  # 4 hours
     dt = state.lastUpdateTime()
     index_file_path = platform.getDataDir() / INDEX_FILE_NAME
 
     if force or dt >= threshold or not index_file_path.exists():
-        _download()
+        # A 304 is a refresh as well, there's just nothing new to compile
+        updated = _download()
+
+        if updated:
+            _compile()
 
         state.State.set("last-update", int(time()))
 
-        return True
+        return updated
 
     return False
 
@@ -67,16 +301,15 @@ def update(force: bool = False) -> bool:
 def get(
     name: str, version_exact: str | None, *, default: Any = _sentinel
 ) -> RemoteLibrary:
-    libraries = _load()
-
-    matches = libraries[name]
+    versions = _load_versions(name)
 
     if version_exact is None:
-        return matches[0]
+        return versions.libraries[0]
+
+    lo, hi = versions.span(version_range(f"={version_exact}"))
 
-    for remote_lib in matches:
-        if version_eq(remote_lib.manifest.library.version, version_exact):
-            return remote_lib
+    if lo < hi:
+        return versions.libraries[lo]
 
     if default is _sentinel:
         raise ValueError(f"Library {name}:{version_exact} not found")
@@ -85,29 +318,32 @@ def get(
         return default
 
 
+def match(pattern: name_pattern.NamePattern) -> list[str]:
+    "Sorted names of the libraries matching `pattern`"
+    _refresh()
+
+    return [name for name in _compiled().names(pattern.prefix) if pattern.matches(name)]
+
+
 # lib1 : ^1.23
 # lib1 : ==1.23
 # lib1 : >=1.23, <= 1.48
 # lib1 : <=1.23
 def search(name: str, constraint: str | None) -> list[RemoteLibrary]:
-    libraries = _load()
-
-    if name not in libraries:
-        return []
-
-    available_versions = libraries[name]
+    versions = _load_versions(name)
 
     if constraint:
-        filtered_versions = [
-            x
-            for x in version_filter(
-                constraint,
-                available_versions,
-                key=lambda x: x.manifest.library.version,
-            )
-        ]
+        lo, hi = versions.span(version_range(constraint))
 
     else:
-        filtered_versions = available_versions
+        lo, hi = 0, len(versions.libraries)
+
+    return versions.libraries[lo:hi][::-1]
+
+
+def search_text(
+    query: str, mode: search_index.T_Mode = "keyword", limit: int | None = None
+) -> list[tuple[str, str, str]]:
+    _refresh()
 
-    return list(reversed(filtered_versions))
+    return _search_index().search(query, mode, limit)
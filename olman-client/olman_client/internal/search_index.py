@@ -0,0 +1,207 @@
+"""
+Inverted index of the words of the remote index, for keyword searches.
+
+Every library is a document, made of the name, tags, descriptions and authors of its
+latest version. Words are weighted by the field they appear in, so a word of the name
+ranks higher than a word of the long description.
+
+The index is written next to the compiled index, as JSON:
+
+    format_version  version of this layout
+    source_key      key of the source JSON file
+    documents       [name, version, short description] of every library
+    terms           sorted words
+    postings        per word, [document, weight] of every library it appears in
+
+Terms are sorted, so prefix queries are a binary search. Fuzzy queries compare the
+query to the terms only, never to the manifests.
+"""
+
+import difflib
+import json
+import math
+import os
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Literal
+
+from olman_version_utils import version_key
+
+FORMAT_VERSION = 1
+
+MODES = ("keyword", "prefix", "fuzzy")
+FUZZY_CUTOFF = 0.75
+FUZZY_MATCHES = 5
+
+FIELD_WEIGHTS = {
+    "name": 8.0,
+    "tags": 4.0,
+    "authors": 2.0,
+    "short_description": 2.0,
+    "long_description": 1.0,
+}
+
+type T_SourceKey = tuple[int, int, int]
+type T_Mode = Literal["keyword", "prefix", "fuzzy"]
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> list[str]:
+    "Lowercase words of `text`, split on anything but letters and digits"
+    return _WORD.findall(text.lower())
+
+
+def _fields(library: dict[str, Any]) -> dict[str, str]:
+    return {
+        "name": library["name"],
+        "tags": " ".join(library.get("tags", [])),
+        "authors": " ".join(author["name"] for author in library.get("authors", [])),
+        "short_description": library.get("short_description", ""),
+        "long_description": library.get("long_description", ""),
+    }
+
+
+def write(
+    path: Path, source_key: T_SourceKey, libraries: dict[str, list[dict[str, Any]]]
+):
+    documents = []
+    postings = defaultdict(dict)
+
+    for doc, name in enumerate(sorted(libraries)):
+        library = max(
+            (remote_lib["manifest"]["library"] for remote_lib in libraries[name]),
+            key=lambda library: version_key(library["version"]),
+        )
+        documents.append(
+            [name, library["version"], library.get("short_description", "")]
+        )
+
+        for field, text in _fields(library).items():
+            for term in tokenize(text):
+                weights = postings[term]
+                weights[doc] = weights.get(doc, 0.0) + FIELD_WEIGHTS[field]
+
+    terms = sorted(postings)
+    data = {
+        "format_version": FORMAT_VERSION,
+        "source_key": source_key,
+        "documents": documents,
+        "terms": terms,
+        "postings": [list(postings[term].items()) for term in terms],
+    }
+
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+
+    os.replace(tmp_path, path)
+
+
+class SearchIndex:
+    source_key: T_SourceKey
+
+    def __init__(self, path: Path) -> None:
+        with open(path, "r") as f:
+            data = json.load(f)
+
+        if data.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Invalid search index: {path}")
+
+        self.source_key = tuple(data["source_key"])
+        self._documents = data["documents"]
+        self._terms = data["terms"]
+        self._postings = data["postings"]
+
+    def _idf(self, i: int) -> float:
+        return math.log(1 + len(self._documents) / len(self._postings[i]))
+
+    def _find(self, token: str, mode: T_Mode) -> list[tuple[int, float]]:
+        "Indices of the terms matching `token`, and how similar they are to it"
+        if mode == "prefix":
+            matches = []
+
+            i = bisect_left(self._terms, token)
+            while i < len(self._terms) and self._terms[i].startswith(token):
+                # Shorter completions are closer to what was typed
+                matches.append((i, len(token) / len(self._terms[i])))
+                i += 1
+
+            return matches
+
+        i = bisect_left(self._terms, token)
+        if i < len(self._terms) and self._terms[i] == token:
+            return [(i, 1.0)]
+
+        # Fuzzy queries only look for other spellings of words which are not indexed
+        if mode == "fuzzy":
+            terms = difflib.get_close_matches(
+                token, self._terms, n=FUZZY_MATCHES, cutoff=FUZZY_CUTOFF
+            )
+
+            return [
+                (
+                    bisect_left(self._terms, term),
+                    difflib.SequenceMatcher(None, token, term).ratio(),
+                )
+                for term in terms
+            ]
+
+        return []
+
+    def search(
+        self, query: str, mode: T_Mode = "keyword", limit: int | None = None
+    ) -> list[tuple[str, str, str]]:
+        """
+        Libraries matching every word of `query`, best match first.
+
+        Returns the name, latest version and short description of every library.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown search mode {mode}, expected one of {MODES}")
+
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        scores = None
+        for token in tokens:
+            token_scores = defaultdict(float)
+
+            for i, similarity in self._find(token, mode):
+                idf = self._idf(i)
+
+                for doc, weight in self._postings[i]:
+                    token_scores[doc] = max(
+                        token_scores[doc], similarity * weight * idf
+                    )
+
+            if scores is None:
+                scores = token_scores
+
+            else:
+                scores = {
+                    doc: score + token_scores[doc]
+                    for doc, score in scores.items()
+                    if doc in token_scores
+                }
+
+        ranking = sorted(
+            scores.items(), key=lambda item: (-item[1], self._documents[item[0]][0])
+        )
+
+        if limit is not None:
+            ranking = ranking[:limit]
+
+        return [tuple(self._documents[doc]) for doc, _ in ranking]
+
+
+def load(path: Path) -> SearchIndex | None:
+    "Open a search index, or return None if it is missing or unreadable."
+    try:
+        return SearchIndex(path)
+
+    except (OSError, ValueError, KeyError):
+        return None
@@ -0,0 +1,73 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from olman_models import LockedLibrary, Lockfile, RemoteLibrary
+from olman_version_utils import version_eq
+
+from olman_client.install_manager import MAX_PARALLEL_DOWNLOADS
+from olman_client.internal import archive_cache, local_index
+
+LOCKFILE_NAME = "olman.lock"
+
+# name, installed version, locked version
+type T_Drift = tuple[str, str, str]
+
+
+def _lock(remote_lib: RemoteLibrary) -> LockedLibrary:
+    path = archive_cache.fetch(remote_lib.download_link)
+
+    return LockedLibrary(
+        **remote_lib.model_dump(),
+        sha256=archive_cache.digest(path),
+    )
+
+
+def lock(
+    requirements: dict[str, str | None],
+    libs: list[RemoteLibrary],
+    *,
+    jobs: int | None = None,
+) -> Lockfile:
+    """
+    Lock resolved libraries to the hash of their archives. The archives are
+    downloaded concurrently into the archive cache, so a following install does not
+    download them again.
+    """
+    with ThreadPoolExecutor(jobs or MAX_PARALLEL_DOWNLOADS) as executor:
+        locked_libs = list(executor.map(_lock, libs))
+
+    # The archives just fetched are the most recently used, and pruned last
+    archive_cache.prune()
+
+    return Lockfile(requirements=requirements, libraries=locked_libs)
+
+
+def read(path: Path) -> Lockfile:
+    with open(path, "r") as f:
+        return Lockfile.model_validate_json(f.read())
+
+
+def write(path: Path, lockfile: Lockfile):
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(lockfile.model_dump_json(indent=2))
+        f.write("\n")
+
+    os.replace(tmp_path, path)
+
+
+def drift(lockfile: Lockfile) -> list[T_Drift]:
+    "Locked libraries which are installed with another version"
+    drifted = []
+
+    for locked_lib in lockfile.libraries:
+        library = locked_lib.manifest.library
+
+        if local_lib := local_index.get(library.name, default=None):
+            installed_version = local_lib.manifest.library.version
+
+            if not version_eq(installed_version, library.version):
+                drifted.append((library.name, installed_version, library.version))
+
+    return drifted
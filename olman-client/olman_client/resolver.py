@@ -0,0 +1,504 @@
+"""
+Conflict-driven dependency resolution, following PubGrub.
+
+see: https://github.com/dart-lang/pub/blob/master/doc/solver.md
+
+Every library has a finite number of versions in the remote index, so a term is
+represented by the set of version strings it allows. `None` in a set stands for "the
+library is not selected", which makes negative terms ordinary sets as well:
+`not foo ^1` is `{None} | (versions of foo not matching ^1)`. Intersection, inversion
+and subset tests on terms are then plain set operations against the library's
+universe, `{None} | all versions of foo`.
+"""
+
+from collections import defaultdict
+from typing import Iterable, NamedTuple
+
+from olman_models import RemoteLibrary
+from olman_version_utils import version_key, version_match, version_sort
+
+from olman_client.internal import remote_index
+
+type T_Name = str
+type T_Version = str
+type T_Constraint = str
+type T_VersionSet = frozenset[T_Version | None]
+
+ROOT_NAME = "<root>"
+ROOT_VERSION = ""
+
+_ROOT_CAUSE = "root"
+_DEPENDENCY_CAUSE = "dependency"
+_CONFLICT_CAUSE = "conflict"
+
+_CONFLICT = object()
+
+_SATISFIED = 0
+_CONTRADICTED = 1
+_INCONCLUSIVE = 2
+
+
+class Incompatibility:
+    "A set of terms that must not all be true at the same time"
+
+    terms: dict[T_Name, T_VersionSet]
+    kind: str
+    parents: tuple["Incompatibility", ...]
+    dependency: tuple[T_Name, T_Version, T_Name, T_Constraint] | None
+
+    def __init__(
+        self,
+        terms: Iterable[tuple[T_Name, T_VersionSet]],
+        kind: str,
+        *,
+        parents: tuple["Incompatibility", ...] = (),
+        dependency: tuple[T_Name, T_Version, T_Name, T_Constraint] | None = None,
+    ) -> None:
+        self.terms = dict()
+
+        for name, versions in terms:
+            if name in self.terms:
+                self.terms[name] = self.terms[name] & versions
+
+            else:
+                self.terms[name] = versions
+
+        self.kind = kind
+        self.parents = parents
+        self.dependency = dependency
+
+
+class ResolutionError(Exception):
+    incompatibility: Incompatibility
+
+    def __init__(self, incompatibility: Incompatibility, explanation: str) -> None:
+        super().__init__(explanation)
+
+        self.incompatibility = incompatibility
+
+
+class _Assignment(NamedTuple):
+    name: T_Name
+    versions: T_VersionSet
+    decision_level: int
+    index: int
+    cause: Incompatibility | None  # None for decisions
+
+
+class _PartialSolution:
+    def __init__(self, resolver: "Resolver") -> None:
+        self._resolver = resolver
+        self.assignments: list[_Assignment] = []
+        self.decisions: dict[T_Name, T_Version] = dict()
+        self._by_name: defaultdict[T_Name, list[_Assignment]] = defaultdict(list)
+        self._accumulated: dict[T_Name, T_VersionSet] = dict()
+
+    @property
+    def decision_level(self) -> int:
+        return len(self.decisions)
+
+    def _assign(self, name: T_Name, versions: T_VersionSet, cause) -> None:
+        assignment = _Assignment(
+            name, versions, self.decision_level, len(self.assignments), cause
+        )
+
+        self.assignments.append(assignment)
+        self._by_name[name].append(assignment)
+        self._accumulated[name] = self.accumulated(name) & versions
+
+    def decide(self, name: T_Name, version: T_Version) -> None:
+        self.decisions[name] = version
+        self._assign(name, frozenset([version]), None)
+
+    def derive(self, name: T_Name, versions: T_VersionSet, cause: Incompatibility):
+        self._assign(name, versions, cause)
+
+    def backtrack(self, decision_level: int) -> None:
+        while self.assignments and self.assignments[-1].decision_level > decision_level:
+            assignment = self.assignments.pop()
+            self._by_name[assignment.name].pop()
+
+            if assignment.cause is None:
+                del self.decisions[assignment.name]
+
+            accumulated = self._resolver._universe(assignment.name)
+            for previous in self._by_name[assignment.name]:
+                accumulated = accumulated & previous.versions
+
+            self._accumulated[assignment.name] = accumulated
+
+    def accumulated(self, name: T_Name) -> T_VersionSet:
+        if name in self._accumulated:
+            return self._accumulated[name]
+
+        return self._resolver._universe(name)
+
+    def relation(self, name: T_Name, versions: T_VersionSet) -> int:
+        accumulated = self.accumulated(name)
+
+        if accumulated <= versions:
+            return _SATISFIED
+
+        elif accumulated.isdisjoint(versions):
+            return _CONTRADICTED
+
+        else:
+            return _INCONCLUSIVE
+
+    def satisfier(self, name: T_Name, versions: T_VersionSet) -> _Assignment:
+        "The earliest assignment after which the solution satisfies the term"
+        accumulated = self._resolver._universe(name)
+
+        for assignment in self._by_name[name]:
+            accumulated = accumulated & assignment.versions
+
+            if accumulated <= versions:
+                return assignment
+
+        raise AssertionError(f"Term for {name} is not satisfied")
+
+    def undecided(self) -> list[T_Name]:
+        "Libraries that must be selected, but don't have a version yet"
+        return [
+            name
+            for name, versions in self._accumulated.items()
+            if name not in self.decisions and None not in versions
+        ]
+
+
+class Resolver:
+    """
+    Pin one version of every library required, directly or indirectly, by
+    `requirements`, which maps library names to version constraints. A `None`
+    constraint allows any version.
+    """
+
+    def __init__(self, requirements: dict[T_Name, T_Constraint | None]) -> None:
+        self._requirements = requirements
+        self._candidates: dict[T_Name, dict[T_Version, RemoteLibrary]] = dict()
+        self._universes: dict[T_Name, T_VersionSet] = dict()
+        self._incompatibilities: defaultdict[T_Name, list[Incompatibility]] = (
+            defaultdict(list)
+        )
+        self._solution = _PartialSolution(self)
+
+    def solve(self) -> dict[T_Name, RemoteLibrary]:
+        self._add(Incompatibility([(ROOT_NAME, frozenset([None]))], _ROOT_CAUSE))
+
+        next_name = ROOT_NAME
+        while next_name is not None:
+            self._propagate(next_name)
+            next_name = self._choose()
+
+        return {
+            name: self._library(name)[version]
+            for name, version in self._solution.decisions.items()
+            if name != ROOT_NAME
+        }
+
+    def _library(self, name: T_Name) -> dict[T_Version, RemoteLibrary]:
+        if name not in self._candidates:
+            candidates = dict()
+
+            for remote_lib in remote_index.search(name, None):
+                candidates.setdefault(remote_lib.manifest.library.version, remote_lib)
+
+            self._candidates[name] = candidates
+
+        return self._candidates[name]
+
+    def _universe(self, name: T_Name) -> T_VersionSet:
+        if name not in self._universes:
+            if name == ROOT_NAME:
+                versions = [ROOT_VERSION]
+
+            else:
+                versions = self._library(name).keys()
+
+            self._universes[name] = frozenset([None, *versions])
+
+        return self._universes[name]
+
+    def _dependencies(self, name: T_Name, version: T_Version) -> dict[str, str]:
+        if name == ROOT_NAME:
+            return self._requirements
+
+        return self._library(name)[version].manifest.dependencies
+
+    def _add(self, incompatibility: Incompatibility) -> None:
+        # Terms allowing anything, including not being selected, are always true
+        for name, versions in list(incompatibility.terms.items()):
+            if versions == self._universe(name):
+                del incompatibility.terms[name]
+
+        for name in incompatibility.terms:
+            self._incompatibilities[name].append(incompatibility)
+
+    def _is_failure(self, incompatibility: Incompatibility) -> bool:
+        terms = incompatibility.terms
+
+        return len(terms) == 0 or (
+            list(terms) == [ROOT_NAME] and None not in terms[ROOT_NAME]
+        )
+
+    def _propagate(self, name: T_Name) -> None:
+        changed = {name}
+
+        while changed:
+            name = changed.pop()
+
+            for incompatibility in reversed(self._incompatibilities[name]):
+                result = self._propagate_incompatibility(incompatibility)
+
+                if result is _CONFLICT:
+                    root_cause = self._resolve_conflict(incompatibility)
+
+                    changed.clear()
+                    changed.add(self._propagate_incompatibility(root_cause))
+                    break
+
+                elif result is not None:
+                    changed.add(result)
+
+    def _propagate_incompatibility(self, incompatibility: Incompatibility):
+        unsatisfied = None
+
+        for name, versions in incompatibility.terms.items():
+            relation = self._solution.relation(name, versions)
+
+            if relation == _CONTRADICTED:
+                return None
+
+            elif relation == _INCONCLUSIVE:
+                if unsatisfied is not None:
+                    return None
+
+                unsatisfied = name
+
+        if unsatisfied is None:
+            return _CONFLICT
+
+        # All other terms hold, so this one must not
+        self._solution.derive(
+            unsatisfied,
+            self._universe(unsatisfied) - incompatibility.terms[unsatisfied],
+            incompatibility,
+        )
+
+        return unsatisfied
+
+    def _resolve_conflict(self, incompatibility: Incompatibility) -> Incompatibility:
+        new_incompatibility = False
+
+        while not self._is_failure(incompatibility):
+            most_recent_name = None
+            most_recent_satisfier = None
+            difference = None
+            previous_level = 1  # root decision
+
+            for name, versions in incompatibility.terms.items():
+                satisfier = self._solution.satisfier(name, versions)
+
+                if most_recent_satisfier is None:
+                    most_recent_name, most_recent_satisfier = name, satisfier
+
+                elif most_recent_satisfier.index < satisfier.index:
+                    previous_level = max(
+                        previous_level, most_recent_satisfier.decision_level
+                    )
+                    most_recent_name, most_recent_satisfier = name, satisfier
+                    difference = None
+
+                else:
+                    previous_level = max(previous_level, satisfier.decision_level)
+
+                if most_recent_name == name:
+                    # The satisfier may only satisfy the term together with earlier
+                    # assignments, which then also take part in the conflict.
+                    difference = most_recent_satisfier.versions - versions
+
+                    if difference:
+                        previous_level = max(
+                            previous_level,
+                            self._solution.satisfier(
+                                name, self._universe(name) - difference
+                            ).decision_level,
+                        )
+
+                    else:
+                        difference = None
+
+            if (
+                previous_level < most_recent_satisfier.decision_level
+                or most_recent_satisfier.cause is None
+            ):
+                self._solution.backtrack(previous_level)
+
+                if new_incompatibility:
+                    self._add(incompatibility)
+
+                return incompatibility
+
+            # Derive a new incompatibility from this one and the cause of its satisfier
+            cause = most_recent_satisfier.cause
+            terms = [
+                *(
+                    (name, versions)
+                    for name, versions in incompatibility.terms.items()
+                    if name != most_recent_name
+                ),
+                *(
+                    (name, versions)
+                    for name, versions in cause.terms.items()
+                    if name != most_recent_name
+                ),
+            ]
+
+            if difference is not None:
+                terms.append(
+                    (most_recent_name, self._universe(most_recent_name) - difference)
+                )
+
+            incompatibility = Incompatibility(
+                terms, _CONFLICT_CAUSE, parents=(incompatibility, cause)
+            )
+            new_incompatibility = True
+
+        raise ResolutionError(incompatibility, self._explain(incompatibility))
+
+    def _choose(self) -> T_Name | None:
+        undecided = self._solution.undecided()
+
+        if not undecided:
+            return None
+
+        # Fewest candidates first, these are the most likely to conflict
+        name = min(undecided, key=lambda name: len(self._solution.accumulated(name)))
+        version = max(
+            (v for v in self._solution.accumulated(name) if v is not None),
+            key=version_key,
+        )
+
+        conflict = False
+        for dep_name, dep_constraint in self._dependencies(name, version).items():
+            matches = frozenset(
+                dep_version
+                for dep_version in self._universe(dep_name)
+                if dep_version is not None
+                and (
+                    dep_constraint is None or version_match(dep_version, dep_constraint)
+                )
+            )
+
+            incompatibility = Incompatibility(
+                [
+                    (name, frozenset([version])),
+                    (dep_name, self._universe(dep_name) - matches),
+                ],
+                _DEPENDENCY_CAUSE,
+                dependency=(name, version, dep_name, dep_constraint),
+            )
+            self._add(incompatibility)
+
+            conflict = conflict or all(
+                term_name == name
+                or self._solution.relation(term_name, versions) == _SATISFIED
+                for term_name, versions in incompatibility.terms.items()
+            )
+
+        if not conflict:
+            self._solution.decide(name, version)
+
+        return name
+
+    # Reporting
+
+    def _format_versions(self, name: T_Name, versions: T_VersionSet) -> str:
+        selected = versions - {None}
+
+        if selected == self._universe(name) - {None}:
+            return name
+
+        selected = version_sort(selected)
+        if len(selected) > 3:
+            selected = [selected[0], "...", selected[-1]]
+
+        return f"{name} ({' | '.join(selected)})"
+
+    def _format_term(self, name: T_Name, versions: T_VersionSet) -> str:
+        if None in versions:
+            return f"not {self._format_versions(name, self._universe(name) - versions)}"
+
+        return self._format_versions(name, versions)
+
+    def _format(self, incompatibility: Incompatibility) -> str:
+        if incompatibility.kind == _ROOT_CAUSE:
+            return "the requested libraries are required"
+
+        if incompatibility.kind == _DEPENDENCY_CAUSE:
+            name, version, dep_name, dep_constraint = incompatibility.dependency
+            if dep_constraint is None:
+                dep_constraint = "(any version)"
+
+            if name == ROOT_NAME:
+                text = f"{dep_name} {dep_constraint} is requested"
+
+            else:
+                text = f"{name} {version} depends on {dep_name} {dep_constraint}"
+
+            if dep_name not in incompatibility.terms:
+                text += f", which matches no version of {dep_name} in the index"
+
+            return text
+
+        # The root is always selected, leave it out
+        terms = {
+            name: versions
+            for name, versions in incompatibility.terms.items()
+            if not (name == ROOT_NAME and None not in versions)
+        }
+
+        if len(terms) == 0:
+            return "version solving failed"
+
+        elif len(terms) == 1:
+            [(name, versions)] = terms.items()
+
+            if None in versions:
+                return (
+                    f"{self._format_versions(name, self._universe(name) - versions)}"
+                    " is required"
+                )
+
+            return f"{self._format_versions(name, versions)} is forbidden"
+
+        return (
+            " and ".join(
+                self._format_term(name, versions) for name, versions in terms.items()
+            )
+            + " are incompatible"
+        )
+
+    def _explain(self, incompatibility: Incompatibility) -> str:
+        if incompatibility.kind != _CONFLICT_CAUSE:
+            return f"Because {self._format(incompatibility)}, version solving failed."
+
+        lines: list[str] = []
+        line_numbers: dict[int, int] = dict()
+
+        def visit(incompatibility: Incompatibility) -> str:
+            if incompatibility.kind != _CONFLICT_CAUSE:
+                return self._format(incompatibility)
+
+            if id(incompatibility) not in line_numbers:
+                causes = [visit(parent) for parent in incompatibility.parents]
+                lines.append(
+                    f"Because {' and '.join(causes)}, {self._format(incompatibility)}."
+                )
+                line_numbers[id(incompatibility)] = len(lines)
+
+            return f"({line_numbers[id(incompatibility)]})"
+
+        visit(incompatibility)
+
+        return "\n".join(f"({i}) {line}" for i, line in enumerate(lines, start=1))
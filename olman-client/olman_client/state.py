@@ -1,9 +1,15 @@
 import json
+import sqlite3
+import threading
 from time import time
 
 from olman_client.files.platform import getCacheDir
 
-STATE_FILE_NAME = "state_file.json"
+STATE_FILE_NAME = "state.sqlite3"
+LEGACY_STATE_FILE_NAME = "state_file.json"
+
+# Seconds to wait for another process to release the state file
+LOCK_TIMEOUT = 30
 
 
 def lastUpdateTime() -> int:
@@ -14,37 +20,103 @@ def lastUpdateTime() -> int:
 
 
 class State:
+    """
+    Persistent key-value store of JSON values.
+
+    Values are kept in memory after the first read. The cache is dropped whenever
+    another process changed the store, which SQLite reports through
+    `PRAGMA data_version`.
+    """
+
     CACHE_PATH = getCacheDir() / STATE_FILE_NAME
+    LEGACY_PATH = getCacheDir() / LEGACY_STATE_FILE_NAME
+
+    _lock = threading.RLock()
+    _connection: sqlite3.Connection | None = None
+    _cache: dict | None = None
+    _data_version: int | None = None
 
-    # TODO: use dbm?
     @staticmethod
-    def _get_state() -> dict:
-        if not State.CACHE_PATH.exists():
-            State.CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    def _connect() -> sqlite3.Connection:
+        if State._connection is not None:
+            return State._connection
+
+        State.CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+
+        # Every statement is its own transaction, unless one is opened explicitly
+        connection = sqlite3.connect(
+            State.CACHE_PATH,
+            timeout=LOCK_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT)"
+        )
+
+        if State.LEGACY_PATH.exists():
+            State._migrate(connection)
+
+        State._connection = connection
 
-            with open(State.CACHE_PATH, "w") as f:
-                f.write("{}")
+        return connection
 
-        with open(State.CACHE_PATH, "r") as f:
-            data = json.load(f)
+    @staticmethod
+    def _migrate(connection: sqlite3.Connection):
+        "Import the JSON state file used by older versions"
+        connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            # Another process may have migrated it while this one waited for the lock
+            if State.LEGACY_PATH.exists():
+                with open(State.LEGACY_PATH, "r") as f:
+                    data = json.load(f)
+
+                # Values already in the store are newer
+                connection.executemany(
+                    "INSERT OR IGNORE INTO state (key, value) VALUES (?, ?)",
+                    [(key, json.dumps(value)) for key, value in data.items()],
+                )
+
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        connection.execute("COMMIT")
 
-        return data
+        State.LEGACY_PATH.unlink(missing_ok=True)
 
     @staticmethod
-    def _set_state(new_state: dict):
-        with open(State.CACHE_PATH, "w") as f:
-            json.dump(new_state, f)
+    def _get_state() -> dict:
+        connection = State._connect()
+
+        data_version = connection.execute("PRAGMA data_version").fetchone()[0]
+
+        if State._cache is None or data_version != State._data_version:
+            State._cache = {
+                key: json.loads(value)
+                for key, value in connection.execute("SELECT key, value FROM state")
+            }
+            State._data_version = data_version
+
+        return State._cache
 
     @staticmethod
     def get(key: str, default=None):
-        data = State._get_state()
+        with State._lock:
+            data = State._get_state()
 
-        return data.get(key, default)
+            return data.get(key, default)
 
     @staticmethod
     def set(key: str, value):
-        data = State._get_state()
+        with State._lock:
+            data = State._get_state()
 
-        data[key] = value
+            State._connect().execute(
+                "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+                (key, json.dumps(value)),
+            )
 
-        State._set_state(data)
+            # Writes of this connection do not change `data_version`
+            data[key] = value
@@ -0,0 +1,155 @@
+import hashlib
+import io
+import json
+import threading
+import zipfile
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from olman_models import RemoteLibrary
+
+from olman_client import state
+from olman_client.internal import archive_cache, local_index, remote_index
+
+
+def remote_lib(
+    name: str, version: str, dependencies: dict[str, str] | None = None, **library
+) -> RemoteLibrary:
+    return RemoteLibrary(
+        download_link=f"https://github.com/test/{name}/archive/{version}.zip",
+        manifest={
+            "manifest_version": "0.0.0-alpha",
+            "library": {
+                "name": name,
+                "version": version,
+                "short_description": "",
+                "long_description": "",
+                **library,
+            },
+            "dependencies": dependencies or {},
+            "urls": {"repository": f"https://github.com/test/{name}"},
+        },
+    )
+
+
+@pytest.fixture
+def local_index_files(tmp_path, monkeypatch):
+    "Local index under `tmp_path`"
+    monkeypatch.setattr(local_index, "index_file_path", tmp_path / "index.sqlite3")
+    monkeypatch.setattr(local_index, "legacy_index_file_path", tmp_path / "index.json")
+
+
+@pytest.fixture
+def state_files(tmp_path, monkeypatch):
+    "State under `tmp_path`, with nothing of it kept in memory"
+    monkeypatch.setattr(state.State, "CACHE_PATH", tmp_path / "state.sqlite3")
+    monkeypatch.setattr(state.State, "LEGACY_PATH", tmp_path / "state_file.json")
+    monkeypatch.setattr(state.State, "_connection", None)
+    monkeypatch.setattr(state.State, "_cache", None)
+    monkeypatch.setattr(state.State, "_data_version", None)
+
+
+@pytest.fixture
+def remote_index_files(tmp_path, monkeypatch):
+    "Remote index under `tmp_path`, written by the returned function"
+    monkeypatch.setattr(remote_index, "index_file_path", tmp_path / "remote_index.json")
+    monkeypatch.setattr(
+        remote_index, "compiled_index_file_path", tmp_path / "remote_index.olmi"
+    )
+    monkeypatch.setattr(
+        remote_index, "search_index_file_path", tmp_path / "remote_index.terms.json"
+    )
+    monkeypatch.setattr(remote_index, "_index_cache", remote_index._IndexCache())
+
+    def write(libraries: list[RemoteLibrary]):
+        with open(remote_index.index_file_path, "w") as f:
+            json.dump(
+                {
+                    "libraries": [
+                        remote_lib.model_dump(mode="json") for remote_lib in libraries
+                    ],
+                    "timestamp": 0,
+                },
+                f,
+            )
+
+    return write
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    Serves `server.files` by path. `server.etag` and `server.last_modified` are sent
+    if set, and a matching If-None-Match is answered with 304.
+    """
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+
+        body = self.server.files.get(self.path)
+        if body is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        if self.server.etag is not None and (
+            self.headers.get("If-None-Match") == self.server.etag
+        ):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.end_headers()
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Length", str(len(body)))
+        if self.server.etag is not None:
+            self.send_header("ETag", self.server.etag)
+        if self.server.last_modified is not None:
+            self.send_header("Last-Modified", self.server.last_modified)
+        self.end_headers()
+
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    "Local HTTP server of `server.files`, whose URLs are given by `server.url(path)`"
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.files = dict()
+    server.etag = None
+    server.last_modified = None
+    server.requests = []
+    server.url = lambda path: f"http://127.0.0.1:{server.server_port}{path}"
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def archives(http_server, tmp_path, monkeypatch):
+    "Archive server, see `served_lib`, and archive cache under `tmp_path`"
+    monkeypatch.setattr(archive_cache, "cache_dir", tmp_path / "cache")
+
+    return http_server
+
+
+def served_lib(server, name: str, version: str) -> tuple[RemoteLibrary, str]:
+    "Library whose archive is served by `server`, and the SHA-256 of the archive"
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as f:
+        f.writestr(f"{name}-{version}/VERSION", version)
+
+    path = f"/{name}-{version}.zip"
+    server.files[path] = buffer.getvalue()
+
+    served = RemoteLibrary(
+        **{**remote_lib(name, version).model_dump(), "download_link": server.url(path)}
+    )
+
+    return served, hashlib.sha256(server.files[path]).hexdigest()
@@ -0,0 +1,115 @@
+import zipfile
+from pathlib import Path
+
+import pytest
+from olman_models import RemoteLibrary
+
+from olman_client import install_manager
+from olman_client.internal import archive_cache, local_index
+
+from .conftest import remote_lib, served_lib
+
+# Replaced by the `install_dir` fixture
+_download = install_manager._download
+
+
+@pytest.fixture
+def install_dir(tmp_path, monkeypatch, local_index_files) -> Path:
+    "Install folder. Archives are made locally, those of version 9.9.9 fail"
+    archives_dir = tmp_path / "archives"
+    archives_dir.mkdir()
+
+    def download(remote_lib: RemoteLibrary) -> Path:
+        library = remote_lib.manifest.library
+
+        if library.version == "9.9.9":
+            raise Exception("Download failed")
+
+        path = archives_dir / f"{library.name}-{library.version}.zip"
+        with zipfile.ZipFile(path, "w") as f:
+            f.writestr(f"{library.name}-{library.version}/VERSION", library.version)
+
+        return path
+
+    install_dir = tmp_path / "install"
+    install_dir.mkdir()
+
+    monkeypatch.setattr(install_manager, "_download", download)
+    monkeypatch.setattr(install_manager, "INSTALL_LOCATION", install_dir)
+
+    return install_dir
+
+
+def installed_version(install_dir: Path, name: str) -> str:
+    assert local_index.get(name).location == (install_dir / name).as_posix()
+
+    return (install_dir / name / "VERSION").read_text()
+
+
+def test_install_all(install_dir):
+    install_manager.install_all([remote_lib("a", "1.0.0"), remote_lib("b", "1.0.0")])
+
+    assert installed_version(install_dir, "a") == "1.0.0"
+    assert installed_version(install_dir, "b") == "1.0.0"
+    assert sorted(path.name for path in install_dir.iterdir()) == ["a", "b"]
+
+
+def test_force_replaces_installed_version(install_dir):
+    install_manager.install_all([remote_lib("a", "1.0.0")])
+    install_manager.install_all([remote_lib("a", "2.0.0")], force=True)
+
+    assert installed_version(install_dir, "a") == "2.0.0"
+    assert local_index.get("a").manifest.library.version == "2.0.0"
+    assert [path.name for path in install_dir.iterdir()] == ["a"]
+
+
+def test_failed_download_keeps_installed_versions(install_dir):
+    install_manager.install_all([remote_lib("a", "1.0.0")])
+
+    with pytest.raises(Exception, match="Download failed"):
+        install_manager.install_all(
+            [remote_lib("a", "2.0.0"), remote_lib("b", "9.9.9")], force=True
+        )
+
+    assert installed_version(install_dir, "a") == "1.0.0"
+    assert local_index.get("b", default=None) is None
+    assert [path.name for path in install_dir.iterdir()] == ["a"]
+
+
+def test_failed_index_update_restores_installed_versions(install_dir, monkeypatch):
+    install_manager.install_all([remote_lib("a", "1.0.0")])
+
+    def add_all(*args, **kwargs):
+        raise Exception("Index update failed")
+
+    monkeypatch.setattr(local_index, "add_all", add_all)
+
+    with pytest.raises(Exception, match="Index update failed"):
+        install_manager.install_all(
+            [remote_lib("a", "2.0.0"), remote_lib("b", "1.0.0")], force=True
+        )
+
+    assert installed_version(install_dir, "a") == "1.0.0"
+    assert [path.name for path in install_dir.iterdir()] == ["a"]
+
+
+def test_archives_pruned_once_installed(install_dir, archives, monkeypatch):
+    monkeypatch.setattr(install_manager, "_download", _download)
+
+    installed_when_pruned = []
+
+    def prune(*args, **kwargs) -> list[Path]:
+        installed_when_pruned.append(
+            [local_index.get(name, default=None) is not None for name in "abc"]
+        )
+        return []
+
+    monkeypatch.setattr(archive_cache, "prune", prune)
+
+    install_manager.install_all(
+        [served_lib(archives, name, "1.0.0")[0] for name in "abc"], jobs=3
+    )
+
+    # Archives downloaded concurrently are not pruned before they are extracted
+    assert installed_when_pruned == [[True, True, True]]
+    assert installed_version(install_dir, "c") == "1.0.0"
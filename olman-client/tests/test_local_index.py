@@ -0,0 +1,85 @@
+import json
+from pathlib import Path
+
+import pytest
+from olman_models import LocalLibrary, Manifest
+
+from olman_client.internal import local_index, name_pattern
+
+
+def manifest(name: str, version: str) -> Manifest:
+    return Manifest(
+        manifest_version="0.0.0-alpha",
+        library={
+            "name": name,
+            "version": version,
+            "short_description": "",
+            "long_description": "",
+        },
+        urls={"repository": f"https://github.com/test/{name}"},
+    )
+
+
+pytestmark = pytest.mark.usefixtures("local_index_files")
+
+
+def write_legacy_index(*names: str):
+    local_libs = [
+        LocalLibrary(
+            manifest=manifest(name, "1.0.0"), location=f"/{name}", date_added=0
+        )
+        for name in names
+    ]
+
+    local_index.legacy_index_file_path.write_text(
+        json.dumps({"libraries": [local_lib.model_dump() for local_lib in local_libs]})
+    )
+
+
+def test_add_all_rejects_installed():
+    local_index.add(manifest("a", "1.0.0"), Path("/a"))
+
+    with pytest.raises(Exception, match="already exists"):
+        local_index.add_all(
+            [(manifest("b", "1.0.0"), Path("/b")), (manifest("a", "2.0.0"), Path("/a"))]
+        )
+
+    # Nothing of the failed batch is added
+    assert local_index.get("b", default=None) is None
+    assert local_index.get("a").manifest.library.version == "1.0.0"
+
+
+def test_add_all_replace():
+    local_index.add(manifest("a", "1.0.0"), Path("/a"))
+
+    local_index.add_all(
+        [(manifest("a", "2.0.0"), Path("/a2")), (manifest("b", "1.0.0"), Path("/b"))],
+        replace=True,
+    )
+
+    assert local_index.get("a").manifest.library.version == "2.0.0"
+    assert local_index.get("a").location == "/a2"
+    assert local_index.get("b").manifest.library.version == "1.0.0"
+
+
+def test_migrate_legacy_index():
+    write_legacy_index("a", "b")
+
+    assert local_index.get("a").location == "/a"
+    assert local_index.match(name_pattern.compile("*")) == ["a", "b"]
+
+    assert not local_index.legacy_index_file_path.exists()
+    assert local_index.legacy_index_file_path.with_name(
+        f"{local_index.LEGACY_INDEX_FILE_NAME}.migrated"
+    ).exists()
+
+
+def test_migration_resumed():
+    # An interrupted migration imported an older copy of "a", but kept the file
+    local_index.add(manifest("a", "0.1.0"), Path("/old"))
+    write_legacy_index("a", "b")
+
+    assert local_index.get("a").manifest.library.version == "1.0.0"
+    assert local_index.get("a").location == "/a"
+    assert local_index.match(name_pattern.compile("*")) == ["a", "b"]
+    assert not local_index.legacy_index_file_path.exists()
@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import pytest
+from olman_models import LockedLibrary, Lockfile
+
+from olman_client import install_manager, lockfile
+from olman_client.internal import archive_cache, local_index
+
+from .conftest import remote_lib, served_lib
+
+
+def locked_lib(name: str, version: str) -> LockedLibrary:
+    return LockedLibrary(**remote_lib(name, version).model_dump(), sha256="0" * 64)
+
+
+def test_lock(archives):
+    a, sha256 = served_lib(archives, "a", "1.0.0")
+
+    locked = lockfile.lock({"a": None}, [a])
+
+    assert locked.requirements == {"a": None}
+    [locked_a] = locked.libraries
+    assert locked_a.download_link == a.download_link
+    assert locked_a.sha256 == sha256
+
+    # The archive is cached for the install
+    assert archive_cache.get(a.download_link) is not None
+
+
+def test_round_trip(tmp_path):
+    locked = Lockfile(
+        requirements={"a": "^1.0", "b": None},
+        libraries=[locked_lib("a", "1.2.0"), locked_lib("b", "2.0.0")],
+    )
+    path = tmp_path / lockfile.LOCKFILE_NAME
+
+    lockfile.write(path, locked)
+
+    assert lockfile.read(path) == locked
+    assert path.read_text().endswith("}\n")
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_drift(local_index_files):
+    local_index.add(remote_lib("a", "1.0").manifest, Path("/a"))
+    local_index.add(remote_lib("b", "2.0.0").manifest, Path("/b"))
+
+    locked = Lockfile(
+        libraries=[
+            locked_lib("a", "1.0.0"),
+            locked_lib("b", "1.0.0"),
+            locked_lib("c", "1.0.0"),
+        ]
+    )
+
+    # Equal versions do not drift, and libraries which are not installed neither
+    assert lockfile.drift(locked) == [("b", "2.0.0", "1.0.0")]
+
+
+def test_download_checks_locked_hash(archives):
+    a, sha256 = served_lib(archives, "a", "1.0.0")
+
+    with pytest.raises(ValueError, match="SHA-256 mismatch"):
+        install_manager._download(LockedLibrary(**a.model_dump(), sha256="0" * 64))
+
+    assert archive_cache.get(a.download_link) is None
+
+    # A cached archive which does not match is downloaded again
+    archive_cache.cache_dir.mkdir(parents=True, exist_ok=True)
+    archive_cache._path(a.download_link).write_bytes(b"corrupted")
+
+    path = install_manager._download(LockedLibrary(**a.model_dump(), sha256=sha256))
+
+    assert archive_cache.digest(path) == sha256
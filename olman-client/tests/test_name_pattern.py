@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import pytest
+
+from olman_client.internal import local_index, name_pattern, remote_index
+
+from .conftest import remote_lib
+
+NAMES = ["ab", "abc", "abcd", "abd", "b", "bc", "{abc"]
+
+
+@pytest.mark.parametrize(
+    "pattern, prefix",
+    [
+        ("abc", "abc"),
+        ("ab*", "ab"),
+        ("ab?d", "ab"),
+        ("ab[cd]", "ab"),
+        ("*b", ""),
+    ],
+)
+def test_glob_prefix(pattern, prefix):
+    assert name_pattern.compile(pattern).prefix == prefix
+
+
+@pytest.mark.parametrize(
+    "pattern, prefix",
+    [
+        ("abc", "abc"),
+        ("^abc", "abc"),
+        ("ab.", "ab"),
+        ("abc*", "ab"),
+        ("abc+", "ab"),
+        ("abc?", "ab"),
+        ("abc{2}", "ab"),
+        ("ab[cd]", "ab"),
+        ("ab\\.", "ab"),
+        ("ab|c", ""),
+        ("{a.c", ""),
+        ("a*", ""),
+    ],
+)
+def test_regex_prefix(pattern, prefix):
+    assert name_pattern.compile(pattern, regex=True).prefix == prefix
+
+
+@pytest.mark.parametrize(
+    "pattern, regex, names",
+    [
+        ("ab", False, ["ab"]),
+        ("ab*", False, ["ab", "abc", "abcd", "abd"]),
+        ("ab?", False, ["abc", "abd"]),
+        ("*c", False, ["abc", "bc", "{abc"]),
+        ("abc?", True, ["ab", "abc"]),
+        ("ab.", True, ["abc", "abd"]),
+        ("b|ab", True, ["ab", "b"]),
+        ("{a.c", True, ["{abc"]),
+    ],
+)
+def test_match(local_index_files, remote_index_files, pattern, regex, names):
+    for name in NAMES:
+        local_index.add(remote_lib(name, "1.0.0").manifest, Path(f"/{name}"))
+    remote_index_files([remote_lib(name, "1.0.0") for name in NAMES])
+
+    compiled = name_pattern.compile(pattern, regex=regex)
+
+    # Whole names only
+    assert local_index.match(compiled) == names
+    assert remote_index.match(compiled) == names
@@ -0,0 +1,89 @@
+import gzip
+import json
+
+import pytest
+
+from olman_client import state
+from olman_client.internal import remote_index
+
+INDEX = json.dumps({"libraries": [], "timestamp": 0}).encode()
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+@pytest.fixture
+def server(http_server, tmp_path, monkeypatch, state_files):
+    "Index server, and client files under `tmp_path`"
+    http_server.files["/remote_index.json"] = INDEX
+    http_server.files["/remote_index.json.gz"] = gzip.compress(INDEX)
+    http_server.etag = ETAG
+    http_server.last_modified = LAST_MODIFIED
+
+    link = http_server.url("/remote_index.json")
+    monkeypatch.setattr(remote_index, "INDEX_FILE_LINK", link)
+    monkeypatch.setattr(remote_index, "INDEX_FILE_GZ_LINK", f"{link}.gz")
+    monkeypatch.setattr(remote_index, "index_file_path", tmp_path / "remote_index.json")
+
+    return http_server
+
+
+def test_download_compressed(server):
+    assert remote_index._download()
+
+    assert remote_index.index_file_path.read_bytes() == INDEX
+    assert [path for path, _ in server.requests] == ["/remote_index.json.gz"]
+
+    assert state.State.get("remote-index-link") == remote_index.INDEX_FILE_GZ_LINK
+    assert state.State.get("remote-index-etag") == ETAG
+    assert state.State.get("remote-index-last-modified") == LAST_MODIFIED
+
+
+def test_fallback_when_compressed_missing(server):
+    del server.files["/remote_index.json.gz"]
+
+    assert remote_index._download()
+
+    assert remote_index.index_file_path.read_bytes() == INDEX
+    assert [path for path, _ in server.requests] == [
+        "/remote_index.json.gz",
+        "/remote_index.json",
+    ]
+    assert state.State.get("remote-index-link") == remote_index.INDEX_FILE_LINK
+
+
+def test_not_modified(server):
+    assert remote_index._download()
+    mtime = remote_index.index_file_path.stat().st_mtime_ns
+
+    assert not remote_index._download()
+
+    _, headers = server.requests[-1]
+    assert headers["If-None-Match"] == ETAG
+    assert headers["If-Modified-Since"] == LAST_MODIFIED
+    assert remote_index.index_file_path.stat().st_mtime_ns == mtime
+
+
+def test_validators_need_index_file(server):
+    assert remote_index._download()
+    remote_index.index_file_path.unlink()
+
+    assert remote_index._download()
+
+    _, headers = server.requests[-1]
+    assert "If-None-Match" not in headers
+    assert remote_index.index_file_path.read_bytes() == INDEX
+
+
+def test_failed_download_keeps_index(server):
+    assert remote_index._download()
+    remote_index.index_file_path.unlink()
+    remote_index.index_file_path.write_bytes(b"previous")
+
+    server.files["/remote_index.json.gz"] = b"not gzip"
+    server.etag = '"v2"'
+
+    with pytest.raises(gzip.BadGzipFile):
+        remote_index._download()
+
+    assert remote_index.index_file_path.read_bytes() == b"previous"
+    assert list(remote_index.index_file_path.parent.glob("*.tmp")) == []
@@ -0,0 +1,109 @@
+import pytest
+from olman_models import RemoteLibrary
+
+from olman_client import resolver
+from olman_client.graph import DependencyGraph
+from olman_client.resolver import ResolutionError, Resolver
+
+from .conftest import remote_lib
+
+
+@pytest.fixture
+def index(monkeypatch):
+    "Remote index made of the libraries added to the returned list"
+    libraries: list[RemoteLibrary] = []
+
+    def search(name: str, constraint: str | None) -> list[RemoteLibrary]:
+        assert constraint is None
+
+        return [
+            remote_lib
+            for remote_lib in libraries
+            if remote_lib.manifest.library.name == name
+        ][::-1]
+
+    monkeypatch.setattr(resolver.remote_index, "search", search)
+
+    return libraries
+
+
+def versions(solution: dict[str, RemoteLibrary]) -> dict[str, str]:
+    return {
+        name: remote_lib.manifest.library.version
+        for name, remote_lib in solution.items()
+    }
+
+
+def test_none_constraint_selects_latest(index):
+    index += [remote_lib("a", "1.0.0"), remote_lib("a", "2.0.0")]
+
+    assert versions(Resolver({"a": None}).solve()) == {"a": "2.0.0"}
+
+
+def test_graph_from_name_without_version(index):
+    index += [
+        remote_lib("a", "1.0.0"),
+        remote_lib("a", "2.0.0", {"b": ">=1.0.0"}),
+        remote_lib("b", "1.0.0"),
+    ]
+
+    graph = DependencyGraph.fromNameVersion("a", None)
+
+    assert [
+        (lib.manifest.library.name, lib.manifest.library.version)
+        for lib in graph.as_list()
+    ] == [("b", "1.0.0"), ("a", "2.0.0")]
+
+
+def test_dependencies_select_latest_match(index):
+    index += [
+        remote_lib("a", "1.0.0", {"b": ">=1.0.0, <2.0.0"}),
+        remote_lib("b", "1.0.0"),
+        remote_lib("b", "1.5.0"),
+        remote_lib("b", "2.0.0"),
+    ]
+
+    assert versions(Resolver({"a": ">=1.0.0"}).solve()) == {
+        "a": "1.0.0",
+        "b": "1.5.0",
+    }
+
+
+def test_backtracks_to_older_version(index):
+    # a 2.0.0 needs both b >= 2 and c, which needs b < 2
+    index += [
+        remote_lib("a", "1.0.0", {"b": ">=1.0.0"}),
+        remote_lib("a", "2.0.0", {"b": ">=2.0.0", "c": ">=1.0.0"}),
+        remote_lib("b", "1.0.0"),
+        remote_lib("b", "2.0.0"),
+        remote_lib("c", "1.0.0", {"b": "<2.0.0"}),
+    ]
+
+    assert versions(Resolver({"a": None}).solve()) == {"a": "1.0.0", "b": "2.0.0"}
+
+
+def test_conflict_is_explained(index):
+    index += [
+        remote_lib("a", "1.0.0", {"c": ">=1.0.0, <2.0.0"}),
+        remote_lib("b", "1.0.0", {"c": ">=2.0.0"}),
+        remote_lib("c", "1.0.0"),
+        remote_lib("c", "2.0.0"),
+    ]
+
+    with pytest.raises(ResolutionError) as e:
+        Resolver({"a": "=1.0.0", "b": "=1.0.0"}).solve()
+
+    explanation = str(e.value)
+    assert "a 1.0.0 depends on c >=1.0.0, <2.0.0" in explanation
+    assert "b 1.0.0 depends on c >=2.0.0" in explanation
+    assert explanation.splitlines()[-1].endswith("version solving failed.")
+
+
+def test_missing_library_is_explained(index):
+    with pytest.raises(ResolutionError) as e:
+        Resolver({"missing": None}).solve()
+
+    assert str(e.value) == (
+        "Because missing (any version) is requested, which matches no version of"
+        " missing in the index, version solving failed."
+    )
@@ -0,0 +1,115 @@
+import pytest
+
+from olman_client.internal import remote_index, search_index
+
+from .conftest import remote_lib
+
+LIBRARIES = [
+    remote_lib("gears", "1.0.0", short_description="Old gears"),
+    remote_lib(
+        "gears",
+        "2.0.0",
+        short_description="Involute gears",
+        tags=["mechanical"],
+        authors=[{"name": "Ada", "email": "ada@example.com"}],
+    ),
+    remote_lib(
+        "threads",
+        "1.0.0",
+        short_description="Screw threads",
+        long_description="Threads for bolts, nuts and gears",
+        tags=["mechanical", "screws"],
+    ),
+    remote_lib("boxes", "1.0.0", long_description="Boxes with hinges"),
+]
+
+
+@pytest.fixture
+def index(tmp_path) -> search_index.SearchIndex:
+    libraries = dict()
+    for library in LIBRARIES:
+        libraries.setdefault(library.manifest.library.name, []).append(
+            library.model_dump(mode="json")
+        )
+
+    path = tmp_path / "terms.json"
+    search_index.write(path, (1, 2, 3), libraries)
+
+    return search_index.SearchIndex(path)
+
+
+def names(results: list[tuple[str, str, str]]) -> list[str]:
+    return [name for name, _, _ in results]
+
+
+def test_tokenize():
+    assert search_index.tokenize("Screw-Threads, M3_bolts 2.0") == [
+        "screw",
+        "threads",
+        "m3",
+        "bolts",
+        "2",
+        "0",
+    ]
+
+
+def test_documents(index):
+    assert index.source_key == (1, 2, 3)
+
+    # The latest version of every library is indexed
+    assert index.search("involute") == [("gears", "2.0.0", "Involute gears")]
+    assert index.search("old") == []
+
+
+def test_field_weights(index):
+    # A word of the name ranks above the same word in a long description
+    assert names(index.search("gears")) == ["gears", "threads"]
+
+    assert names(index.search("ada")) == ["gears"]
+    assert names(index.search("mechanical")) == ["gears", "threads"]
+
+
+def test_all_tokens_must_match(index):
+    assert names(index.search("mechanical screws")) == ["threads"]
+    assert names(index.search("gears hinges")) == []
+    assert index.search("") == []
+
+
+def test_limit(index):
+    assert names(index.search("mechanical", limit=1)) == ["gears"]
+
+
+def test_keyword_mode(index):
+    assert index.search("gear") == []
+    assert index.search("gaers") == []
+
+
+def test_prefix_mode(index):
+    assert names(index.search("gea", "prefix")) == ["gears", "threads"]
+    assert names(index.search("hin", "prefix")) == ["boxes"]
+    assert index.search("gaers", "prefix") == []
+
+
+def test_fuzzy_mode(index):
+    assert names(index.search("thraeds", "fuzzy")) == ["threads"]
+    assert names(index.search("hinge", "fuzzy")) == ["boxes"]
+
+    # Indexed words are not compared to other spellings
+    assert names(index.search("boxes", "fuzzy")) == ["boxes"]
+
+
+def test_unknown_mode(index):
+    with pytest.raises(ValueError, match="Unknown search mode"):
+        index.search("gears", "regex")
+
+
+def test_stale_search_index_rebuilt(remote_index_files):
+    remote_index_files(LIBRARIES)
+    assert names(remote_index.search_text("gears")) == ["gears", "threads"]
+
+    # A new remote index, with the search index of the previous one left on disk
+    remote_index_files([remote_lib("cogs", "1.0.0", long_description="Gears")])
+    remote_index.index_file_path.touch()
+
+    assert names(remote_index.search_text("gears")) == ["cogs"]
+    assert remote_index._search_index().source_key == remote_index._file_key()
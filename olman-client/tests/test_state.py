@@ -0,0 +1,64 @@
+import json
+import sqlite3
+import threading
+
+from olman_client.state import State
+
+
+def reopen():
+    "Drop the connection and cache, like a new process"
+    State._connection.close()
+    State._connection = None
+    State._cache = None
+
+
+def test_migrate_legacy_state(state_files):
+    State.LEGACY_PATH.write_text(json.dumps({"last-update": 42, "etag": '"v1"'}))
+
+    assert State.get("last-update") == 42
+    assert State.get("etag") == '"v1"'
+    assert not State.LEGACY_PATH.exists()
+
+    # Migrated once, the values persist without the legacy file
+    reopen()
+
+    assert State.get("last-update") == 42
+
+
+def test_migration_keeps_newer_values(state_files):
+    State.set("last-update", 100)
+    reopen()
+
+    State.LEGACY_PATH.write_text(json.dumps({"last-update": 42, "etag": '"v1"'}))
+
+    assert State.get("last-update") == 100
+    assert State.get("etag") == '"v1"'
+
+
+def test_sees_writes_of_other_connections(state_files):
+    State.set("key", "mine")
+    assert State.get("key") == "mine"
+
+    # Another process writes to the store
+    with sqlite3.connect(State.CACHE_PATH) as other:
+        other.execute(
+            "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+            ("key", json.dumps("theirs")),
+        )
+
+    assert State.get("key") == "theirs"
+
+
+def test_threads_share_connection(state_files):
+    def work(i: int):
+        for j in range(20):
+            State.set(f"thread-{i}", j)
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert [State.get(f"thread-{i}") for i in range(4)] == [19] * 4
@@ -3,6 +3,8 @@ from .models import (
     Library,
     License,
     LocalLibrary,
+    LockedLibrary,
+    Lockfile,
     Manifest,
     Person,
     RemoteLibrary,
@@ -101,6 +101,25 @@ class RemoteLibrary(BaseModel):
     download_link: str
 
 
+class LockedLibrary(RemoteLibrary):
+    sha256: NonEmptyString = Field(
+        REQUIRED,
+    )
+
+
+class Lockfile(BaseModel):
+    lockfile_version: str = Field(
+        default="1",
+    )
+    # None for any version
+    requirements: dict[str, Optional[str]] = Field(
+        default_factory=dict,
+    )
+    libraries: list[LockedLibrary] = Field(
+        default_factory=list,
+    )
+
+
 class LocalLibrary(BaseModel):
     manifest: Manifest = Field(
         REQUIRED,
@@ -1,22 +1,43 @@
 import argparse
+import cProfile
+import gzip
+import heapq
 import json
 import logging
+import os
 import tempfile
 import time
 import tomllib
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED
 from concurrent.futures import ProcessPoolExecutor as ppe
+from concurrent.futures import wait
+from contextlib import contextmanager
 from pathlib import Path
-from subprocess import run
+from shutil import copyfileobj
+from subprocess import CalledProcessError
+from typing import Iterable, Iterator
 
 from olman_models import Manifest
 from olman_vcs_utils import getRepoZipLink
 from olman_version_utils import version_key
 
+from olman_remote import (
+    default_cache_dir,
+    ls_remote_tags,
+    mirror,
+    mirror_path,
+    objects_size,
+    read_files,
+)
+
 ACCEPTED_REPOSITORIES_FILENAME = "accepted_repositories.txt"
 INDEX_FILENAME = "remote_index.json"
 MANIFEST_FILENAME = "manifest.toml"
 INDEX_SOURCE_SEPARATOR = "||"
 RECORD_SEP = ", "
+SKIPPED_SUFFIX = ".skipped.json"
+MAX_PENDING_PER_JOB = 2
 
 DEFAULT_VERBOSITY_LEVEL = 0
 VERBOSITY_LEVELS = [
@@ -33,83 +54,231 @@ class Utils:
         exit(1)
 
 
-def process_repo(repo_url: str, lib_name: str) -> list:
+class RepoReport:
+    "Wall time of every phase of processing a repository, and bytes transferred"
+
+    def __init__(self) -> None:
+        self.timings = defaultdict(float)
+        self.bytes_transferred = 0
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+
+        try:
+            yield
+
+        finally:
+            self.timings[name] += time.perf_counter() - start
+
+    def as_dict(self) -> dict:
+        return {
+            "bytes_transferred": self.bytes_transferred,
+            "timings": dict(self.timings),
+        }
+
+
+def skipped_path(index_path: Path) -> Path:
+    "File of the tags skipped when generating the index at `index_path`"
+    return index_path.with_name(index_path.name + SKIPPED_SUFFIX)
+
+
+def list_tag_shas(repo_url: str) -> list[str]:
+    # Tag object IDs of annotated tags, which pin the download links of the index
+    return list(ls_remote_tags(repo_url, peel=False).values())
+
+
+def process_repo(
+    repo_url: str,
+    lib_name: str,
+    known_entries: dict[str, dict] | None = None,
+    known_skipped: set[str] | None = None,
+    mirror_cache: Path | None = None,
+    report: RepoReport | None = None,
+) -> tuple[list, list[str]]:
+    """
+    Parse the manifest of every tag of a library repository. Returns the index
+    entries, and the download links of the tags skipped because they have no manifest
+    or one of another library.
+
+    `known_entries` maps download links to index entries of a previous run, and
+    `known_skipped` holds the links it skipped. Tags whose link is known are reused
+    or skipped as is, so the repository is only fetched if it has new tags.
+
+    Repositories are fetched into mirrors under `mirror_cache`, see
+    `olman_remote.mirror`. The time spent in every phase is recorded in `report`.
+    """
     logger = logging.getLogger(lib_name)
-    logger.debug("Creating temp dir")
-    with tempfile.TemporaryDirectory() as repo_directory:
-        logger.info("Cloning the repo")
-        run(
-            ["git", "clone", "--depth", "1", repo_url, repo_directory],
-            cwd=repo_directory,
-            capture_output=True,
-            check=True,
-        )
 
-        # Get all tags in library repo
-        logger.info("Fetching tags")
-        run(
-            ["git", "fetch", "--tags"],
-            cwd=repo_directory,
-            capture_output=True,
-            check=True,
-        )
+    if known_entries is None:
+        known_entries = dict()
 
-        logger.info("Getting the tag SHAs")
-        proc = run(
-            ["git", "show-ref", "--tags"],
-            cwd=repo_directory,
-            capture_output=True,
-            text=True,
-            check=True,
-        )
+    if known_skipped is None:
+        known_skipped = set()
 
-        # get tag name from here
-        # 60a7d86cb43d087855dd001c547ed1f82f617387 refs/tags/1.0.0
-        tag_shas = [
-            commit_tag.split()[0] for commit_tag in proc.stdout.strip().split("\n")
-        ]
-        logger.debug(f"{tag_shas = }")
-
-        # Parse manifest of every tag
-        entries = []
-        for tag_sha in tag_shas:
-            logger.info(f"Checking out SHA {tag_sha}")
-            run(
-                ["git", "checkout", tag_sha],
-                cwd=repo_directory,
-                capture_output=True,
-                check=True,
-            )
+    if mirror_cache is None:
+        mirror_cache = default_cache_dir()
+
+    if report is None:
+        report = RepoReport()
+
+    logger.info("Listing tags")
+    with report.phase("list_tags"):
+        tag_shas = list_tag_shas(repo_url)
+    logger.debug(f"{tag_shas = }")
+
+    entries = []
+    skipped = []
+    new_tag_shas = []
+    for tag_sha in tag_shas:
+        download_link = getRepoZipLink(repo_url, sha=tag_sha)
+
+        if download_link in known_entries:
+            entries.append(known_entries[download_link])
+
+        elif download_link in known_skipped:
+            skipped.append(download_link)
 
-            # Get library info from manifest
-            logger.info("Parsing manifest")
-            manifest_path = Path(repo_directory) / MANIFEST_FILENAME
-            with open(manifest_path, "rb") as f:
-                manifest_data = tomllib.load(f)
+        else:
+            new_tag_shas.append(tag_sha)
 
-            # Validate all fields
+    logger.info(
+        f"{len(entries)} known tags, {len(skipped)} known skipped tags,"
+        f" {len(new_tag_shas)} new tags"
+    )
+
+    if not new_tag_shas:
+        return entries, skipped
+
+    logger.info("Updating the repo mirror")
+    size_before = objects_size(mirror_path(repo_url, mirror_cache))
+    start = time.perf_counter()
+    with mirror(repo_url, mirror_cache) as repo_directory:
+        report.timings["fetch"] += time.perf_counter() - start
+
+        # Only the manifest blob of every new tag is fetched and read
+        logger.info("Reading manifests")
+        with report.phase("read_manifests"):
+            manifests = read_files(repo_directory, new_tag_shas, MANIFEST_FILENAME)
+
+        # Packs only grow here, unless git decided to repack
+        report.bytes_transferred += max(objects_size(repo_directory) - size_before, 0)
+
+    for tag_sha in new_tag_shas:
+        logger.info(f"Parsing manifest of SHA {tag_sha}")
+        manifest_toml = manifests[tag_sha]
+
+        if manifest_toml is None:
+            logging.warning(f"tag {tag_sha} in {repo_url} has no manifest")
+            skipped.append(getRepoZipLink(repo_url, sha=tag_sha))
+            continue
+
+        with report.phase("parse_toml"):
+            manifest_data = tomllib.loads(manifest_toml.decode())
+
+        # Validate all fields
+        with report.phase("validate"):
             manifest = Manifest(**manifest_data)
 
-            # Check name
-            logger.info("Checking name")
-            if manifest.library.name != lib_name:
-                logging.warning(f"tag {tag_sha} in {repo_url} contains invalid name")
-                continue
+        # Check name
+        logger.info("Checking name")
+        if manifest.library.name != lib_name:
+            logging.warning(f"tag {tag_sha} in {repo_url} contains invalid name")
+            skipped.append(getRepoZipLink(repo_url, sha=tag_sha))
+            continue
 
-            # TODO: check if tag name matches version
+        # TODO: check if tag name matches version
 
-            # Add to list
-            logging.info("Adding library to list")
-            entries.append(
-                {
-                    "manifest": manifest.model_dump(),
-                    "download_link": getRepoZipLink(repo_url, sha=tag_sha),
-                }
-            )
+        # Add to list
+        logging.info("Adding library to list")
+        entries.append(
+            {
+                "manifest": manifest.model_dump(),
+                "download_link": getRepoZipLink(repo_url, sha=tag_sha),
+            }
+        )
 
     logger.debug("entries:")
     logger.debug(entries)
-    return entries
+    return entries, skipped
+
+
+def entry_key(entry: dict):
+    return (
+        entry["manifest"]["library"]["name"],
+        version_key(entry["manifest"]["library"]["version"]),
+    )
+
+
+def spool_repo(spool_path: Path, profile_path: Path | None = None, **kwargs) -> dict:
+    """
+    Write the entries of `process_repo(**kwargs)` to `spool_path`.
+
+    Entries are written sorted, one JSON object per line, so the workers do not send
+    them back to the main process. Returns the number of entries, the download links
+    of the skipped tags and the `RepoReport` of the repository. If `profile_path` is
+    set, cProfile stats of the task are dumped to it.
+    """
+    report = RepoReport()
+    profiler = cProfile.Profile() if profile_path is not None else None
+
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+
+    try:
+        entries, skipped = process_repo(**kwargs, report=report)
+
+        with report.phase("spool"):
+            write_spool(spool_path, entries)
+
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+
+    report.timings["total"] = time.perf_counter() - start
+
+    return {"entries": len(entries), "skipped": skipped, **report.as_dict()}
+
+
+def write_spool(spool_path: Path, entries: Iterable[dict]):
+    with open(spool_path, "w") as f:
+        for entry in sorted(entries, key=entry_key):
+            print(json.dumps(entry, sort_keys=True), file=f)
+
+
+def read_spool(spool_path: Path) -> Iterator[dict]:
+    with open(spool_path, "r") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def merge_spools(spools: dict[str, list[Path]]) -> Iterator[dict]:
+    "Entries of all spool files, sorted by library name and version"
+    # A repository only contains entries of its own library, so only the (normally
+    #   single) spool files of a library name are merged at a time
+    for lib_name in sorted(spools):
+        yield from heapq.merge(*map(read_spool, spools[lib_name]), key=entry_key)
+
+
+def write_index(path: Path, entries: Iterable[dict], timestamp: float):
+    """
+    Stream `entries` to an index file.
+
+    The output is the same as `json.dump(..., sort_keys=True)` of the whole index,
+    without holding it in memory.
+    """
+    with open(path, "w") as f:
+        f.write('{"libraries": [')
+
+        for i, entry in enumerate(entries):
+            if i > 0:
+                f.write(RECORD_SEP)
+
+            f.write(json.dumps(entry, sort_keys=True))
+
+        f.write(f'], "timestamp": {json.dumps(timestamp)}}}')
 
 
 def main():
@@ -127,6 +296,23 @@ def main():
         required=True,
         help="Path to output file.",
     )
+    parser.add_argument(
+        "-p",
+        "--previous",
+        required=False,
+        default=None,
+        help=(
+            "Path to a previous index. Entries of tags it already contains are reused,"
+            " and tags it skipped are skipped again."
+        ),
+    )
+    parser.add_argument(
+        "--mirror-cache",
+        required=False,
+        default=default_cache_dir(),
+        type=Path,
+        help="Folder of the repository mirrors, kept between runs.",
+    )
     parser.add_argument(
         "-j",
         "--jobs",
@@ -135,6 +321,11 @@ def main():
         type=int,
         help="Number of parallel jobs.",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Dump cProfile stats of every repository next to the output file.",
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -156,10 +347,85 @@ def main():
     logging.debug(f"{accepted_repositories_path = }")
     logging.debug(f"{index_file_path = }")
 
-    records = []
+    # Wall time of the phases of the whole run
+    report = RepoReport()
+
+    profile_dir = None
+    if args.profile:
+        profile_dir = index_file_path.with_name(index_file_path.name + ".profile")
+        profile_dir.mkdir(exist_ok=True)
+        logging.info(f"Writing profiles to {profile_dir}")
+
+    # Previous entries per library, by download link (which pins the tag SHA)
+    known_entries = defaultdict(dict)
+    if args.previous is not None and Path(args.previous).exists():
+        logging.info("Loading previous index")
+        with report.phase("load_previous"), open(args.previous, "r") as f:
+            for entry in json.load(f)["libraries"]:
+                lib_name = entry["manifest"]["library"]["name"]
+                known_entries[lib_name][entry["download_link"]] = entry
+
+    # Download links of the tags skipped by the previous run, per library
+    known_skipped = defaultdict(set)
+    if args.previous is not None and skipped_path(Path(args.previous)).exists():
+        logging.info("Loading previously skipped tags")
+        with (
+            report.phase("load_previous"),
+            open(skipped_path(Path(args.previous))) as f,
+        ):
+            for lib_name, download_links in json.load(f).items():
+                known_skipped[lib_name].update(download_links)
+
+    # Entries are spooled to one file per repository by the workers, and only the
+    #   paths of the files are kept here
+    spools = defaultdict(list)
+    skipped = defaultdict(list)
+    results = []
+    window = MAX_PENDING_PER_JOB * (args.jobs or os.cpu_count() or 1)
+
+    def collect(done, pending):
+        for future in done:
+            result = pending.pop(future)
+
+            try:
+                result.update(future.result())
+                report.bytes_transferred += result["bytes_transferred"]
+                spools[result["library"]].append(result.pop("spool"))
+
+                skipped[result["library"]] += result["skipped"]
+                result["skipped"] = len(result["skipped"])
+
+            except Exception as e:
+                logging.error(f"Failed to process {result['repository']}: {e!r}")
+                result["error"] = repr(e)
+
+                # The entries of the previous run are kept, so a transient failure
+                #   does not remove the library from the index
+                lib_name = result["library"]
+                spool_path = result.pop("spool")
+                write_spool(spool_path, known_entries.get(lib_name, {}).values())
+                spools[lib_name].append(spool_path)
+                skipped[lib_name] += sorted(known_skipped.get(lib_name, ()))
+
+                if isinstance(e, CalledProcessError) and e.stderr:
+                    result["stderr"] = (
+                        e.stderr.decode(errors="replace")
+                        if isinstance(e.stderr, bytes)
+                        else e.stderr
+                    )
+
+            results.append(result)
+
     logging.debug("Creating process pool")
     logging.info("Opening accepted repositories file")
-    with ppe(args.jobs) as p, open(accepted_repositories_path, "r") as f_arp:
+    with (
+        ppe(args.jobs) as p,
+        tempfile.TemporaryDirectory(prefix="olman-index-") as spool_dir,
+        open(accepted_repositories_path, "r") as f_arp,
+    ):
+        pending = dict()
+        start = time.perf_counter()
+
         logging.debug("Processing lines")
         while line := f_arp.readline():
             line = line.strip()
@@ -173,30 +439,80 @@ def main():
             logging.debug(f"{repo_url = }")
             logging.debug(f"{lib_name = }")
 
+            # Bound the number of submitted repos
+            if len(pending) >= window:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done, pending)
+
             # parse repo
             logging.info(f"Processing repo: {repo_url}")
+            task_number = len(results) + len(pending)
+            spool_path = Path(spool_dir) / f"{task_number}.jsonl"
+            profile_path = (
+                profile_dir / f"{task_number}-{lib_name}.prof"
+                if profile_dir is not None
+                else None
+            )
             future = p.submit(
-                process_repo,
+                spool_repo,
+                spool_path,
+                profile_path,
                 repo_url=repo_url,
                 lib_name=lib_name,
+                known_entries=known_entries.get(lib_name),
+                known_skipped=known_skipped.get(lib_name),
+                mirror_cache=args.mirror_cache,
             )
-            future.add_done_callback(lambda x: records.extend(x.result()))
+            pending[future] = {
+                "repository": repo_url,
+                "library": lib_name,
+                "spool": spool_path,
+            }
 
-    # TODO: correctly sort versions with libversion
-    records.sort(
-        key=lambda x: (
-            x["manifest"]["library"]["name"],
-            version_key(x["manifest"]["library"]["version"]),
-        )
-    )
+        done, _ = wait(pending)
+        collect(done, pending)
+        report.timings["process"] = time.perf_counter() - start
+
+        logging.info("Writing index")
+        with report.phase("write_index"):
+            write_index(index_file_path, merge_spools(spools), time.time())
+
+            with open(skipped_path(index_file_path), "w") as f:
+                json.dump(
+                    {lib_name: sorted(links) for lib_name, links in skipped.items()},
+                    f,
+                    indent=2,
+                    sort_keys=True,
+                )
+
+    # Compressed copy served next to the index for clients that support it
+    logging.info("Compressing index")
+    with (
+        report.phase("compress"),
+        open(index_file_path, "rb") as f_in,
+        gzip.GzipFile(
+            index_file_path.with_name(index_file_path.name + ".gz"), "wb", mtime=0
+        ) as f_out,
+    ):
+        copyfileobj(f_in, f_out)
+
+    failures = [result for result in results if "error" in result]
+    if failures:
+        logging.error(f"{len(failures)} of {len(results)} repositories failed")
 
-    with open(index_file_path, "w") as f:
+    logging.info("Writing report")
+    with open(
+        index_file_path.with_name(index_file_path.name + ".report.json"), "w"
+    ) as f:
         json.dump(
             {
-                "libraries": records,
+                "failures": len(failures),
+                "repositories": results,
                 "timestamp": time.time(),
+                **report.as_dict(),
             },
             f,
+            indent=2,
             sort_keys=True,
         )
 
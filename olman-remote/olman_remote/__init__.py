@@ -0,0 +1,12 @@
+from .git import (
+    CatFile,
+    GitObject,
+    fetch_file,
+    fetch_objects,
+    ls_remote_tags,
+    normalize_git_url,
+    objects_size,
+    partial_clone,
+    read_files,
+)
+from .mirror import default_cache_dir, mirror, mirror_path
@@ -0,0 +1,300 @@
+"""
+Read files out of git repositories without checking them out.
+
+Repositories are cloned bare and blobless, so a clone only transfers commits and
+trees. The blobs of the files that are read are then fetched in a single request, and
+read through one long-lived `git cat-file --batch` process.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from subprocess import PIPE, Popen, run
+from typing import Iterable, NamedTuple
+from urllib.parse import ParseResult, urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class GitObject(NamedTuple):
+    oid: str
+    type: str
+    data: bytes
+
+
+def normalize_git_url(raw_url: ParseResult | str) -> ParseResult:
+    """Transforms the GIT repo URL into a normalized format.
+    Removing trailing slashes and adding .git postfix.
+
+    Parameters
+    ----------
+    raw_url : ParseResult | str
+        URL to be normalized
+
+    Returns
+    -------
+    ParseResult
+        Normalized GIT repo URL
+    """
+    if isinstance(raw_url, str):
+        raw_url = urlparse(raw_url)
+
+    normalized_url = raw_url._replace(path=raw_url.path.rstrip("/"))
+
+    if normalized_url.path == "":
+        normalized_url = normalized_url._replace(path="/")
+
+    elif not normalized_url.path.endswith(".git"):
+        normalized_url = normalized_url._replace(path=normalized_url.path + ".git")
+
+    normalized_url = urlparse(f"https://{normalized_url.hostname}{normalized_url.path}")
+    return normalized_url
+
+
+def partial_clone(repo_url: str, directory: Path | str):
+    "Bare clone of `repo_url` into `directory`, without the blobs of any revision"
+    # Servers which do not support filters send the whole repository instead
+    run(
+        ["git", "clone", "--quiet", "--bare", "--filter=blob:none", repo_url, "."],
+        cwd=directory,
+        capture_output=True,
+        check=True,
+    )
+
+
+def ls_remote_tags(repo_url: str, *, peel: bool = True) -> dict[str, str]:
+    """
+    Tags of a remote repository, mapped to the ID of the commit they point to. Without
+    `peel`, annotated tags are mapped to the ID of the tag object instead.
+
+    A single request, which also tells whether `repo_url` is a reachable repository:
+    raises `CalledProcessError` if it is not.
+    """
+    proc = run(
+        ["git", "ls-remote", "--tags", repo_url],
+        capture_output=True,
+        text=True,
+        check=True,
+        # Fail instead of asking for the credentials of a private repository
+        env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+    )
+
+    # 60a7d86cb43d087855dd001c547ed1f82f617387	refs/tags/1.0.0
+    # Annotated tags are followed by their peeled commit (refs/tags/1.0.0^{}),
+    #   which replaces the ID of the tag object, or is skipped like `git show-ref`.
+    tags = dict()
+    for line in proc.stdout.splitlines():
+        oid, ref = line.split("\t")
+
+        if ref.endswith("^{}") and not peel:
+            continue
+
+        tags[ref.removeprefix("refs/tags/").removesuffix("^{}")] = oid
+
+    return tags
+
+
+def fetch_file(repo_url: str, ref: str, file_name: str) -> bytes | None:
+    """
+    Content of the top-level file `file_name` at `ref` of a remote repository, None
+    if it does not have the file.
+
+    Only the commit of `ref`, its tree and the blob of the file are fetched, into a
+    temporary repository.
+    """
+    with tempfile.TemporaryDirectory() as git_dir:
+        run(["git", "init", "--quiet", "--bare"], cwd=git_dir, check=True)
+        run(["git", "remote", "add", "origin", repo_url], cwd=git_dir, check=True)
+
+        # The filter makes origin the promisor remote, which `read_files` fetches the
+        #   blob from
+        run(
+            [
+                "git",
+                "fetch",
+                "--quiet",
+                "--depth=1",
+                "--filter=blob:none",
+                "--no-tags",
+                "origin",
+                ref,
+            ],
+            cwd=git_dir,
+            capture_output=True,
+            check=True,
+        )
+
+        return read_files(git_dir, ["FETCH_HEAD"], file_name)["FETCH_HEAD"]
+
+
+def objects_size(git_dir: Path | str) -> int:
+    "Size in bytes of the object store of a bare repository, 0 if it does not exist"
+    objects_dir = Path(git_dir) / "objects"
+
+    if not objects_dir.exists():
+        return 0
+
+    return sum(path.stat().st_size for path in objects_dir.rglob("*") if path.is_file())
+
+
+def fetch_objects(git_dir: Path | str, oids: Iterable[str]) -> bool:
+    """
+    Fetch objects by ID from the promisor remote of a partial clone.
+
+    This is what git does lazily for every missing object, done once for all of
+    them. Returns False if the remote refused the request, in which case the objects
+    are still fetched one by one when they are read.
+    """
+    oids = "".join(f"{oid}\n" for oid in oids)
+
+    if not oids:
+        return True
+
+    proc = run(
+        [
+            "git",
+            "-c",
+            "fetch.negotiationAlgorithm=noop",
+            "fetch",
+            "--quiet",
+            "--no-tags",
+            "--no-write-fetch-head",
+            "--recurse-submodules=no",
+            "--filter=blob:none",
+            "--stdin",
+            "origin",
+        ],
+        cwd=git_dir,
+        input=oids,
+        capture_output=True,
+        text=True,
+    )
+
+    if proc.returncode != 0:
+        logger.debug(f"Could not prefetch objects: {proc.stderr.strip()}")
+
+    return proc.returncode == 0
+
+
+class CatFile:
+    "Long-lived `git cat-file --batch` process of a repository"
+
+    def __init__(self, git_dir: Path | str) -> None:
+        self._process = Popen(
+            ["git", "cat-file", "--batch"],
+            cwd=git_dir,
+            stdin=PIPE,
+            stdout=PIPE,
+        )
+
+    def __enter__(self) -> "CatFile":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._process.stdin.close()
+        self._process.stdout.close()
+        self._process.wait()
+
+    def read_all(self, revs: Iterable[str]) -> list[GitObject | None]:
+        """
+        Read the objects named by `revs`, e.g. `<sha>:<path>`.
+
+        Requests are written from another thread while the answers are read, so
+        neither pipe can fill up. Missing objects are None.
+        """
+        revs = list(revs)
+
+        writer = threading.Thread(target=self._write, args=(revs,))
+        writer.start()
+
+        try:
+            objects = [self._read() for _ in revs]
+
+        finally:
+            writer.join()
+
+        return objects
+
+    def read(self, rev: str) -> GitObject | None:
+        return self.read_all([rev])[0]
+
+    def _write(self, revs: list[str]) -> None:
+        self._process.stdin.writelines(f"{rev}\n".encode() for rev in revs)
+        self._process.stdin.flush()
+
+    def _read(self) -> GitObject | None:
+        # <oid> <type> <size>\n<data>\n, or <rev> missing\n
+        header = self._process.stdout.readline()
+
+        if not header:
+            raise Exception("git cat-file exited unexpectedly")
+
+        fields = header.split()
+
+        if len(fields) != 3:
+            return None
+
+        oid, obj_type, size = fields
+        data = self._process.stdout.read(int(size))
+        self._process.stdout.read(1)
+
+        return GitObject(oid.decode(), obj_type.decode(), data)
+
+
+def _tree_entry(tree: GitObject, name: str) -> str | None:
+    "ID of the entry `name` of a raw tree object"
+    # <mode> <name>\0<binary oid>, repeated
+    oid_size = len(tree.oid) // 2
+    name_b = name.encode()
+    data = tree.data
+
+    i = 0
+    while i < len(data):
+        name_start = data.index(b" ", i) + 1
+        name_end = data.index(b"\0", name_start)
+        oid_end = name_end + 1 + oid_size
+
+        if data[name_start:name_end] == name_b:
+            return data[name_end + 1 : oid_end].hex()
+
+        i = oid_end
+
+    return None
+
+
+def read_files(
+    git_dir: Path | str, revs: Iterable[str], file_name: str
+) -> dict[str, bytes | None]:
+    """
+    Content of the top-level file `file_name` at every revision of `revs`.
+
+    Trees are read first, then the missing blobs are fetched at once, so reading the
+    file of many revisions of a partial clone costs a single request to the remote.
+    Revisions without the file map to None.
+    """
+    revs = list(revs)
+
+    with CatFile(git_dir) as cat_file:
+        trees = cat_file.read_all(f"{rev}^{{tree}}" for rev in revs)
+
+        blob_oids = {
+            rev: _tree_entry(tree, file_name) if tree is not None else None
+            for rev, tree in zip(revs, trees)
+        }
+        unique_oids = sorted({oid for oid in blob_oids.values() if oid is not None})
+
+        fetch_objects(git_dir, unique_oids)
+        blobs = {
+            oid: blob
+            for oid, blob in zip(unique_oids, cat_file.read_all(unique_oids))
+            if blob is not None and blob.type == "blob"
+        }
+
+    return {
+        rev: blobs[oid].data if oid in blobs else None for rev, oid in blob_oids.items()
+    }
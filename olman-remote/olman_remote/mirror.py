@@ -0,0 +1,105 @@
+"""
+Persistent cache of bare, blobless mirrors of library repositories.
+
+There is one mirror per normalized repository URL. A mirror is cloned the first time
+it is used and later only updated with `git fetch`, so repeated runs of the index
+generator or of the PR parser only transfer new objects. Mirrors are locked while
+they are in use, which makes them safe to share between concurrent workers.
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from subprocess import run
+from typing import Iterator
+
+from .git import normalize_git_url, partial_clone
+
+MIRROR_CACHE_ENV = "OLMAN_MIRROR_CACHE"
+
+logger = logging.getLogger(__name__)
+
+
+def default_cache_dir() -> Path:
+    if cache_dir := os.environ.get(MIRROR_CACHE_ENV):
+        return Path(cache_dir)
+
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+
+    return Path(xdg_cache_home) / "olman-remote" / "mirrors"
+
+
+def mirror_path(repo_url: str, cache_dir: Path) -> Path:
+    # Normalized, so spellings of the same repository share a mirror
+    url = normalize_git_url(repo_url).geturl()
+
+    # Readable, but unique and safe to use as a file name
+    key = hashlib.sha256(url.encode()).hexdigest()[:16]
+    name = Path(url).stem
+
+    return cache_dir / f"{name}-{key}.git"
+
+
+def _clone(repo_url: str, path: Path):
+    # Cloned next to its final location and moved in place once complete, so an
+    #   interrupted clone never leaves a broken mirror behind
+    with tempfile.TemporaryDirectory(dir=path.parent) as clone_directory:
+        partial_clone(repo_url, clone_directory)
+
+        # Bare clones do not track the remote's branches
+        run(
+            ["git", "config", "remote.origin.fetch", "+refs/heads/*:refs/heads/*"],
+            cwd=clone_directory,
+            capture_output=True,
+            check=True,
+        )
+
+        os.rename(clone_directory, path)
+
+
+def _fetch(path: Path):
+    # --force, as moved tags would be rejected otherwise
+    run(
+        ["git", "fetch", "--quiet", "--prune", "--tags", "--force", "origin"],
+        cwd=path,
+        capture_output=True,
+        check=True,
+    )
+
+
+@contextmanager
+def mirror(repo_url: str, cache_dir: Path | None = None) -> Iterator[Path]:
+    """
+    Up to date mirror of `repo_url`, locked for the duration of the context.
+
+    The mirror is a bare partial clone: blobs are fetched when they are read, e.g.
+    with `read_files`.
+    """
+    if cache_dir is None:
+        cache_dir = default_cache_dir()
+
+    path = mirror_path(repo_url, cache_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(path.with_name(f"{path.name}.lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        try:
+            if path.exists():
+                logger.info(f"Updating mirror {path}")
+                _fetch(path)
+
+            else:
+                logger.info(f"Creating mirror {path}")
+                # Cloned from the URL as given, which is also the one listed with
+                #   `git ls-remote`: normalized URLs are always https
+                _clone(repo_url, path)
+
+            yield path
+
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -3,8 +3,8 @@ import argparse
 import json
 import logging
 import subprocess
-import tempfile
 import tomllib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from enum import StrEnum
 from pathlib import Path
 from pprint import pformat
@@ -12,14 +12,18 @@ from textwrap import indent as tw_indent
 from urllib.parse import ParseResult, urlparse
 
 # External libraries
-import requests
 import unidiff
+from olman_version_utils import version_sort
+
+# Local libraries
+from olman_remote import fetch_file, ls_remote_tags, normalize_git_url
 
 # ---------------------------------------------------------------------------- #
 
 MANIFEST_FILENAME = "manifest.toml"
 INDEX_SOURCE_SEPARATOR = "||"
 OUTPUT_INDENTATION = 2
+DEFAULT_JOBS = 8
 
 DEFAULT_VERBOSITY_LEVEL = 0
 VERBOSITY_LEVELS = [
@@ -47,22 +51,6 @@ VALID_REPO_TYPES = [
 
 
 class Utils:
-    @staticmethod
-    def url_accessible(url: ParseResult) -> bool:
-        """Check if a given URL is accessible with a GET request or not.
-
-        Parameters
-        ----------
-        url : ParseResult
-            URL to be checked
-
-        Returns
-        -------
-        bool
-            True if the response is 200 (OK). False otherwise.
-        """
-        return requests.get(url.geturl()).ok
-
     @staticmethod
     def error_exit(msg: str):
         logging.error(msg=msg)
@@ -84,21 +72,7 @@ class Utils:
         ParseResult
             Normalized GIT repo URL
         """
-        if isinstance(raw_url, str):
-            raw_url = urlparse(raw_url)
-
-        normalized_url = raw_url._replace(path=raw_url.path.rstrip("/"))
-
-        if normalized_url.path == "":
-            normalized_url = normalized_url._replace(path="/")
-
-        elif not normalized_url.path.endswith(".git"):
-            normalized_url = normalized_url._replace(path=normalized_url.path + ".git")
-
-        normalized_url = urlparse(
-            f"https://{normalized_url.hostname}{normalized_url.path}"
-        )
-        return normalized_url
+        return normalize_git_url(raw_url)
 
     @staticmethod
     def url_is_under(url: ParseResult, candidates: str | list[str]) -> bool:
@@ -146,6 +120,53 @@ class MyEncoder(json.JSONEncoder):
         return o.__dict__
 
 
+class RepositoryList:
+    """Repositories already in the library manager.
+
+    The files are read once, so checking a submission against them is a set lookup.
+
+    Parameters
+    ----------
+    list_path : Path
+        Path to the list file, one repository URL per line
+    accepted_repositories_path : Path | None
+        Path to the accepted repositories file, `URL||name` per line. Provides the
+        names of the existing libraries.
+    """
+
+    def __init__(
+        self, list_path: Path, accepted_repositories_path: Path | None = None
+    ) -> None:
+        self.urls: set[str] = set()
+        self.names: dict[str, str] = dict()
+
+        logging.info("Opening list file")
+        for list_line in self._lines(list_path):
+            self.urls.add(Utils.normalize_git_url(list_line).geturl())
+
+        if accepted_repositories_path is not None:
+            logging.info("Opening accepted repositories file")
+            for line in self._lines(accepted_repositories_path):
+                repo_url, lib_name = line.split(INDEX_SOURCE_SEPARATOR)
+                normalized_url = Utils.normalize_git_url(repo_url).geturl()
+
+                self.urls.add(normalized_url)
+                self.names[lib_name] = normalized_url
+
+        logging.debug(f"{len(self.urls)} repositories, {len(self.names)} names")
+
+    @staticmethod
+    def _lines(path: Path) -> list[str]:
+        with open(path, "r") as f:
+            lines = (line.strip() for line in f)
+
+            return [line for line in lines if line and not line.startswith("#")]
+
+
+class SubmissionError(Exception):
+    "A submission was rejected. The message is shown to the submitter."
+
+
 class Submission:
     # url: str
     # normalized_url: str
@@ -154,20 +175,18 @@ class Submission:
     # tag: str # latest tag
     # name: str
     # index_entry: str
-    def __init__(self, submission_url: str, list_path: Path):
+    def __init__(
+        self,
+        submission_url: str,
+        repository_list: RepositoryList,
+    ):
         logging.info("Creating Submission")
         logging.debug(f"{submission_url = }")
-        logging.debug(f"{list_path = }")
 
         # normalize and validate URL
         logging.info("Parsing submission URL")
         url_obj = urlparse(submission_url)
 
-        # check if URL is accessible
-        logging.info("Checking the URL accessibility")
-        if not Utils.url_accessible(url_obj):
-            Utils.error_exit("Unable to load submission URL. Is the repository public?")
-
         # normalize url
         logging.info("Normalizing URL")
         normalized_url = Utils.normalize_git_url(url_obj)
@@ -176,23 +195,10 @@ class Submission:
         # Check if url is from a supported Git host
         logging.info("Checking URL Git host")
         if not Utils.url_is_under(normalized_url, SUPPORTED_HOSTS):
-            Utils.error_exit(
+            raise SubmissionError(
                 f"{normalized_url.hostname} is not currently supported as a Git hosting website."
             )
 
-        # Check if URL is a Git repository
-        logging.info("Checking if the URL points to a Git repository")
-        if (
-            subprocess.run(
-                ["git", "ls-remote", normalized_url.geturl()],
-                capture_output=True,
-            ).returncode
-            != 0
-        ):
-            Utils.error_exit(
-                f"Submission URL ({normalized_url.geturl()}) is not a Git clone URL"
-            )
-
         self.url = submission_url
         self.normalized_url = normalized_url.geturl()
         self.repository_name = Path(normalized_url.path).stem
@@ -201,15 +207,8 @@ class Submission:
         logging.debug(f"repository_name: {self.repository_name}")
 
         logging.info("Checking if the URL is already in the list")
-        logging.info("Opening list file")
-        with open(list_path, "r") as list_file:
-            for list_line in list_file.readlines():
-                normalized_list_url = Utils.normalize_git_url(list_line)
-                logging.debug(f"{list_line = }")
-                logging.debug(f"{normalized_list_url = }")
-
-                if normalized_url == normalized_list_url:
-                    Utils.error_exit("URL is already in the list")
+        if self.normalized_url in repository_list.urls:
+            raise SubmissionError("URL is already in the list")
 
         logging.info("Checking if the URL is from an official OpenSCAD organization")
         self.official = Utils.url_is_under(normalized_url, OFFICIAL_ORGANIZATIONS)
@@ -218,98 +217,81 @@ class Submission:
         logging.info("Processing the submission repository")
         self._parse_submission_repo()
 
+        logging.info("Checking if the library name is already taken")
+        if (url := repository_list.names.get(self.name)) is not None:
+            raise SubmissionError(f"A library named {self.name} already exists: {url}")
+
     def _parse_submission_repo(self):
-        with tempfile.TemporaryDirectory() as submission_repo_directory:
-            logging.info("Cloning the submission repository")
-            subprocess.run(
-                [
-                    "git",
-                    "clone",
-                    "--depth",
-                    "1",
-                    self.normalized_url,
-                    submission_repo_directory,
-                ],
-                cwd=submission_repo_directory,
-                capture_output=True,
-                check=True,
+        # A single request checks that the URL points to a reachable Git repository
+        #   and lists its tags
+        logging.info("Listing the repository's tags")
+        try:
+            tags = ls_remote_tags(self.normalized_url)
+
+        except subprocess.CalledProcessError:
+            raise SubmissionError(
+                f"Submission URL ({self.normalized_url}) is not a Git clone URL. "
+                "Is the repository public?"
             )
+        logging.debug(f"{tags = }")
 
-            # Determine latest tag name in submission repo
-            logging.info("Fetching the repository's tags")
-            subprocess.run(
-                ["git", "fetch", "--tags"],
-                cwd=submission_repo_directory,
-                capture_output=True,
-                check=True,
-            )
+        if not tags:
+            raise SubmissionError("The repository has no tags.")
 
-            logging.info("Getting the repository's latest tag SHA")
-            proc = subprocess.run(
-                ["git", "rev-list", "--tags", "--max-count=1"],
-                cwd=submission_repo_directory,
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            tag_sha = proc.stdout.strip()
-            logging.debug(f"{tag_sha = }")
-
-            if tag_sha == "":
-                Utils.error_exit("The repository has no tags.")
-
-            logging.info("Getting the repository's latest tag name")
-            proc = subprocess.run(
-                ["git", "describe", "--tags", tag_sha],
-                cwd=submission_repo_directory,
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            self.tag = proc.stdout.strip()
-            logging.debug(f"tag: {self.tag}")
-
-            # Checkout latest tag
-            logging.info("Checking out the tag's commit")
-            subprocess.run(
-                ["git", "checkout", self.tag],
-                cwd=submission_repo_directory,
-                capture_output=True,
-                check=True,
+        logging.info("Getting the repository's latest tag name")
+        self.tag = version_sort(tags, reverse=True)[0]
+        logging.debug(f"tag: {self.tag}")
+
+        # Only the manifest blob of the tag's commit is fetched
+        logging.info("Reading the tag's manifest")
+        try:
+            manifest_toml = fetch_file(
+                self.normalized_url, f"refs/tags/{self.tag}", MANIFEST_FILENAME
             )
 
-            # Get submission library name.
-            # It is necessary to record this in the index source entry because
-            #   the library is locked to this name.
-            logging.info("Opening the manifest")
-            manifest_path = Path(submission_repo_directory) / MANIFEST_FILENAME
-            with open(manifest_path, "rb") as f:
-                manifest_data = tomllib.load(f, parse_float=lambda x: x)
-                logging.debug("manifest_data:")
-                logging.debug(Utils.indent(pformat(manifest_data)))
-
-            # # TODO: validate manifest here
-            logging.info("Validating the manifest")
-            # manifest_data: dict
-
-            logging.info("Getting manifest information")
-            self.name = manifest_data["library"]["name"]
-            self.index_entry = INDEX_SOURCE_SEPARATOR.join(
-                (self.normalized_url, self.name)
+        except subprocess.CalledProcessError:
+            raise SubmissionError(
+                f"Could not fetch the tag {self.tag} of {self.normalized_url}."
             )
-            logging.debug(f"name: {self.name}")
-            logging.debug("Submission index_entry:")
-            logging.debug(Utils.indent(self.index_entry))
+
+        if manifest_toml is None:
+            raise SubmissionError(f"The tag {self.tag} has no {MANIFEST_FILENAME}.")
+
+        # Get submission library name.
+        # It is necessary to record this in the index source entry because
+        #   the library is locked to this name.
+        logging.info("Parsing the manifest")
+        manifest_data = tomllib.loads(manifest_toml.decode(), parse_float=lambda x: x)
+        logging.debug("manifest_data:")
+        logging.debug(Utils.indent(pformat(manifest_data)))
+
+        # # TODO: validate manifest here
+        logging.info("Validating the manifest")
+        # manifest_data: dict
+
+        logging.info("Getting manifest information")
+        self.name = manifest_data["library"]["name"]
+        self.index_entry = INDEX_SOURCE_SEPARATOR.join((self.normalized_url, self.name))
+        logging.debug(f"name: {self.name}")
+        logging.debug("Submission index_entry:")
+        logging.debug(Utils.indent(self.index_entry))
 
 
 class SubmissionRequest:  # pull request
     # type: str
     # submissions: list[Submission]
     # index_entry: str
-    def __init__(self, diff_path: Path, list_path: Path) -> None:
+    def __init__(
+        self,
+        diff_path: Path,
+        list_path: Path,
+        jobs: int = DEFAULT_JOBS,
+        accepted_repositories_path: Path | None = None,
+    ) -> None:
         logging.info("Creating SubmissionRequest")
         logging.debug(f"{diff_path = }")
         logging.debug(f"{list_path = }")
+        logging.debug(f"{accepted_repositories_path = }")
 
         # Read PR diff
         logging.info("Opening diff file")
@@ -378,15 +360,19 @@ class SubmissionRequest:  # pull request
             self.type = "modification"
         logging.debug(f"type : {self.type}")
 
+        logging.info("Reading the existing repositories")
+        repository_list = RepositoryList(list_path, accepted_repositories_path)
+
         # Parse submission urls
         logging.info("Parsing submission URLs")
-        self.submissions = [
-            Submission(submission_url, list_path) for submission_url in submission_urls
-        ]
+        self.submissions = self._parse_submissions(
+            submission_urls, repository_list, jobs
+        )
 
         # Check for duplicates within the submission itself.
         logging.info("Checking for duplicates within the submission")
         url2name = {}
+        name2url = {}
         for sub in self.submissions:
             if url2name.get(sub.normalized_url, None) is not None:
                 Utils.error_exit(
@@ -394,7 +380,11 @@ class SubmissionRequest:  # pull request
                 )
             url2name[sub.normalized_url] = sub.name
 
-        # TODO: Check for duplicates with existing repositories
+            if name2url.get(sub.name, None) is not None:
+                Utils.error_exit(
+                    f"Duplicated library name found: {sub.name} - {sub.normalized_url}"
+                )
+            name2url[sub.name] = sub.normalized_url
 
         # Assemble the list of Library Manager indexer logs URLs for the submissions
         #   to show in the acceptance message.
@@ -403,6 +393,54 @@ class SubmissionRequest:  # pull request
         logging.info("SubmissionRequest index_entry:")
         logging.info(Utils.indent(self.index_entry))
 
+    @staticmethod
+    def _parse_submissions(
+        submission_urls: list[str],
+        repository_list: RepositoryList,
+        jobs: int,
+    ) -> list[Submission]:
+        """Validate the submissions concurrently.
+
+        Once a submission fails, the submissions after it in the diff which have not
+        started yet are cancelled. The ones before it still complete, so the error
+        raised is the one of the first failing submission in diff order, as if they
+        were validated one after the other.
+
+        Parameters
+        ----------
+        submission_urls : list[str]
+            Submission URLs, in diff order
+        repository_list : RepositoryList
+            Repositories already in the library manager
+        jobs : int
+            Number of submissions validated at the same time
+
+        Returns
+        -------
+        list[Submission]
+            Submissions, in diff order
+        """
+        with ThreadPoolExecutor(jobs) as executor:
+            futures = [
+                executor.submit(Submission, submission_url, repository_list)
+                for submission_url in submission_urls
+            ]
+            first_failure = len(futures)
+
+            for future in as_completed(futures):
+                if future.cancelled() or future.exception() is None:
+                    continue
+
+                i = futures.index(future)
+                if i < first_failure:
+                    first_failure = i
+
+                    for later_future in futures[i + 1 :]:
+                        later_future.cancel()
+
+        # Raises the error of the first failure
+        return [future.result() for future in futures]
+
 
 def main() -> int:
     parser = argparse.ArgumentParser("pr_submission_parser")
@@ -417,6 +455,12 @@ def main() -> int:
         required=True,
         help="Path to List file.",
     )
+    parser.add_argument(
+        "--accepted-repositories",
+        required=False,
+        default=None,
+        help="Path to the accepted repositories file, to check library names against.",
+    )
     parser.add_argument(
         "-o",
         "--output",
@@ -424,6 +468,14 @@ def main() -> int:
         default=None,
         help="Path to output file. Output is printed to STDOUT otherwise.",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        required=False,
+        default=DEFAULT_JOBS,
+        type=int,
+        help="Number of submissions validated in parallel.",
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -451,7 +503,26 @@ def main() -> int:
     if not list_path.exists():
         Utils.error_exit(f"list file must exist: {list_path}")
 
-    req = SubmissionRequest(diff_path, list_path)
+    accepted_repositories_path = None
+    if args.accepted_repositories is not None:
+        accepted_repositories_path = Path(args.accepted_repositories)
+        logging.debug(f"{accepted_repositories_path = }")
+
+        if not accepted_repositories_path.exists():
+            Utils.error_exit(
+                f"accepted repositories file must exist: {accepted_repositories_path}"
+            )
+
+    try:
+        req = SubmissionRequest(
+            diff_path,
+            list_path,
+            args.jobs,
+            accepted_repositories_path,
+        )
+
+    except SubmissionError as e:
+        Utils.error_exit(str(e))
 
     logging.info("Converting SubmissionRequest to JSON")
     json_str = json.dumps(req, cls=MyEncoder, indent=OUTPUT_INDENTATION)
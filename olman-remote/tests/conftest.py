@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import pytest
+
+from .repos import git
+
+
+@pytest.fixture(autouse=True)
+def git_env(tmp_path, monkeypatch):
+    "Isolate git from the user's configuration"
+    config_path = tmp_path / "gitconfig"
+    config_path.touch()
+
+    monkeypatch.setenv("GIT_CONFIG_GLOBAL", config_path.as_posix())
+    monkeypatch.setenv("GIT_CONFIG_NOSYSTEM", "1")
+
+    for role in ["AUTHOR", "COMMITTER"]:
+        monkeypatch.setenv(f"GIT_{role}_NAME", "olman")
+        monkeypatch.setenv(f"GIT_{role}_EMAIL", "olman@example.com")
+
+
+@pytest.fixture
+def github(tmp_path, git_env) -> Path:
+    "Folder whose repositories git reaches through https://github.com/ URLs"
+    root = tmp_path / "github.com"
+    root.mkdir()
+
+    git(
+        "config",
+        "--global",
+        f"url.{root.as_uri()}/.insteadOf",
+        "https://github.com/",
+        cwd=tmp_path,
+    )
+
+    return root
@@ -0,0 +1,71 @@
+"Local git repositories for the tests"
+
+from pathlib import Path
+from subprocess import run
+
+
+def git(*args: str, cwd: Path) -> str:
+    return run(
+        ["git", *args], cwd=cwd, capture_output=True, text=True, check=True
+    ).stdout
+
+
+def manifest(name: str, version: str) -> str:
+    return f"""
+manifest_version = "0.0.0-alpha"
+
+[library]
+name = "{name}"
+version = "{version}"
+short_description = ""
+long_description = ""
+
+[urls]
+repository = "https://github.com/test/{name}"
+"""
+
+
+def make_repo(path: Path, tags: dict[str, dict[str, str]]) -> str:
+    """
+    Bare repository at `path`, with a commit per tag holding the given files.
+    Returns its file:// URL.
+    """
+    work_dir = path.with_name(f"{path.name}.work")
+    work_dir.mkdir(parents=True)
+    git("init", "--quiet", "--initial-branch=main", cwd=work_dir)
+
+    for tag, files in tags.items():
+        add_tag(work_dir, tag, files)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    git(
+        "clone",
+        "--quiet",
+        "--bare",
+        work_dir.as_posix(),
+        path.as_posix(),
+        cwd=path.parent,
+    )
+
+    return path.as_uri()
+
+
+def add_tag(work_dir: Path, tag: str, files: dict[str, str]):
+    for existing in work_dir.iterdir():
+        if existing.name != ".git":
+            existing.unlink()
+
+    for file_name, content in files.items():
+        (work_dir / file_name).write_text(content)
+
+    git("add", "--all", cwd=work_dir)
+    git("commit", "--quiet", "--allow-empty", "-m", tag, cwd=work_dir)
+    git("tag", tag, cwd=work_dir)
+
+
+def push_tag(path: Path, tag: str, files: dict[str, str]):
+    "Add a tagged commit to the bare repository made by `make_repo`"
+    work_dir = path.with_name(f"{path.name}.work")
+
+    add_tag(work_dir, tag, files)
+    git("push", "--quiet", "--tags", path.as_posix(), "main", cwd=work_dir)
@@ -0,0 +1,19 @@
+from olman_remote import ls_remote_tags
+
+from .repos import git, make_repo
+
+
+def test_ls_remote_tags(tmp_path):
+    repo_path = tmp_path / "repos" / "alpha.git"
+    repo_url = make_repo(repo_path, {"1.0.0": {"a": "1"}})
+    git("tag", "--annotate", "-m", "2.0.0", "2.0.0", "1.0.0", cwd=repo_path)
+
+    commit = git("rev-parse", "1.0.0", cwd=repo_path).strip()
+    tag_object = git("rev-parse", "2.0.0", cwd=repo_path).strip()
+    assert tag_object != commit
+
+    assert ls_remote_tags(repo_url) == {"1.0.0": commit, "2.0.0": commit}
+    assert ls_remote_tags(repo_url, peel=False) == {
+        "1.0.0": commit,
+        "2.0.0": tag_object,
+    }
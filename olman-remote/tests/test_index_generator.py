@@ -0,0 +1,121 @@
+import json
+import shutil
+import sys
+
+import index_generator
+
+from .repos import make_repo, manifest, push_tag
+
+
+def generate(monkeypatch, accepted_path, output_path, mirror_cache, previous=None):
+    "Run the generator, and return its report"
+    argv = [
+        "index_generator",
+        f"--accepted-repositories={accepted_path}",
+        f"--output={output_path}",
+        f"--mirror-cache={mirror_cache}",
+        "--jobs=1",
+    ]
+    if previous is not None:
+        argv.append(f"--previous={previous}")
+
+    monkeypatch.setattr(sys, "argv", argv)
+    index_generator.main()
+
+    with open(output_path.with_name(output_path.name + ".report.json")) as f:
+        return json.load(f)
+
+
+def versions(index_path) -> list[str]:
+    with open(index_path) as f:
+        return [
+            entry["manifest"]["library"]["version"]
+            for entry in json.load(f)["libraries"]
+        ]
+
+
+def test_incremental_run_skips_known_tags(tmp_path, monkeypatch):
+    # Download links are only generated for GitHub URLs
+    repo_path = tmp_path / "github.com" / "test" / "alpha.git"
+    repo_url = make_repo(
+        repo_path,
+        {
+            "1.0.0": {"manifest.toml": manifest("alpha", "1.0.0")},
+            "1.1.0": {"alpha.scad": ""},
+            "1.2.0": {"manifest.toml": manifest("beta", "1.2.0")},
+        },
+    )
+
+    accepted_path = tmp_path / "accepted_repositories.txt"
+    accepted_path.write_text(f"{repo_url}||alpha\n")
+    mirror_cache = tmp_path / "mirrors"
+
+    first_path = tmp_path / "first.json"
+    report = generate(monkeypatch, accepted_path, first_path, mirror_cache)
+
+    [repo_report] = report["repositories"]
+    assert "fetch" in repo_report["timings"]
+    assert repo_report["skipped"] == 2
+    assert versions(first_path) == ["1.0.0"]
+
+    # Nothing changed: the skipped tags are not read again
+    second_path = tmp_path / "second.json"
+    report = generate(
+        monkeypatch, accepted_path, second_path, mirror_cache, previous=first_path
+    )
+
+    [repo_report] = report["repositories"]
+    assert "fetch" not in repo_report["timings"]
+    assert repo_report["skipped"] == 2
+    assert second_path.read_text().split('"timestamp"')[0] == (
+        first_path.read_text().split('"timestamp"')[0]
+    )
+    assert index_generator.skipped_path(second_path).read_text() == (
+        index_generator.skipped_path(first_path).read_text()
+    )
+
+    # Only new tags are fetched
+    push_tag(repo_path, "2.0.0", {"manifest.toml": manifest("alpha", "2.0.0")})
+
+    third_path = tmp_path / "third.json"
+    report = generate(
+        monkeypatch, accepted_path, third_path, mirror_cache, previous=second_path
+    )
+
+    [repo_report] = report["repositories"]
+    assert "fetch" in repo_report["timings"]
+    assert versions(third_path) == ["1.0.0", "2.0.0"]
+
+
+def test_failed_repository_keeps_previous_entries(tmp_path, monkeypatch):
+    repo_path = tmp_path / "github.com" / "test" / "alpha.git"
+    repo_url = make_repo(
+        repo_path,
+        {
+            "1.0.0": {"manifest.toml": manifest("alpha", "1.0.0")},
+            "1.1.0": {"alpha.scad": ""},
+        },
+    )
+
+    accepted_path = tmp_path / "accepted_repositories.txt"
+    accepted_path.write_text(f"{repo_url}||alpha\n")
+    mirror_cache = tmp_path / "mirrors"
+
+    first_path = tmp_path / "first.json"
+    generate(monkeypatch, accepted_path, first_path, mirror_cache)
+
+    # Listing the tags of the repository fails
+    shutil.rmtree(repo_path)
+
+    second_path = tmp_path / "second.json"
+    report = generate(
+        monkeypatch, accepted_path, second_path, mirror_cache, previous=first_path
+    )
+
+    [repo_report] = report["repositories"]
+    assert report["failures"] == 1
+    assert "error" in repo_report
+    assert versions(second_path) == ["1.0.0"]
+    assert index_generator.skipped_path(second_path).read_text() == (
+        index_generator.skipped_path(first_path).read_text()
+    )
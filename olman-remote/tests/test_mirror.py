@@ -0,0 +1,28 @@
+from olman_remote import mirror, mirror_path, read_files
+
+from .repos import git, make_repo, push_tag
+
+
+def test_mirror_clones_url_as_given(tmp_path):
+    # Normalizing a file:// URL would turn it into an https one
+    repo_url = make_repo(tmp_path / "repos" / "alpha.git", {"1.0.0": {"a": "1"}})
+    cache_dir = tmp_path / "mirrors"
+
+    with mirror(repo_url, cache_dir) as path:
+        assert path == mirror_path(repo_url, cache_dir)
+        assert git("tag", cwd=path).split() == ["1.0.0"]
+
+
+def test_mirror_fetches_new_tags(tmp_path):
+    repo_path = tmp_path / "repos" / "alpha.git"
+    repo_url = make_repo(repo_path, {"1.0.0": {"a": "1"}})
+    cache_dir = tmp_path / "mirrors"
+
+    with mirror(repo_url, cache_dir):
+        pass
+
+    push_tag(repo_path, "2.0.0", {"a": "2"})
+
+    with mirror(repo_url, cache_dir) as path:
+        assert git("tag", cwd=path).split() == ["1.0.0", "2.0.0"]
+        assert read_files(path, ["2.0.0"], "a") == {"2.0.0": b"2"}
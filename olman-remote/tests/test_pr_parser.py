@@ -0,0 +1,130 @@
+import subprocess
+import time
+
+import pytest
+
+import pr_parser
+from pr_parser import RepositoryList, SubmissionError, SubmissionRequest
+
+from .repos import make_repo, manifest
+
+
+def submission_url(github, name: str, tags: dict | None = None) -> str:
+    "URL of a new repository of the library `name`, with a tag of it by default"
+    if tags is None:
+        tags = {"1.0.0": {"manifest.toml": manifest(name, "1.0.0")}}
+
+    make_repo(github / "test" / f"{name}.git", tags)
+
+    return f"https://github.com/test/{name}"
+
+
+@pytest.fixture
+def repository_list(tmp_path) -> RepositoryList:
+    "Existing repositories: one listed, and one accepted as the library taken"
+    list_path = tmp_path / "repositories.txt"
+    list_path.write_text("https://github.com/test/listed\n")
+
+    accepted_path = tmp_path / "accepted_repositories.txt"
+    accepted_path.write_text("https://github.com/test/taken||taken\n")
+
+    return RepositoryList(list_path, accepted_path)
+
+
+def parse(urls: list[str], repository_list: RepositoryList, jobs: int = 4) -> list:
+    return SubmissionRequest._parse_submissions(urls, repository_list, jobs)
+
+
+def test_results_in_input_order(github, repository_list):
+    names = ["delta", "alpha", "charlie", "bravo"]
+    urls = [submission_url(github, name) for name in names]
+
+    submissions = parse(urls, repository_list)
+
+    assert [submission.name for submission in submissions] == names
+    assert [submission.tag for submission in submissions] == ["1.0.0"] * 4
+    assert submissions[1].index_entry == "https://github.com/test/alpha.git||alpha"
+
+
+def test_first_failure_in_input_order(github, repository_list):
+    urls = [
+        submission_url(github, "alpha"),
+        "https://github.com/test/missing",
+        submission_url(github, "beta", tags={}),
+    ]
+
+    with pytest.raises(SubmissionError, match="is not a Git clone URL"):
+        parse(urls, repository_list)
+
+
+def test_later_submissions_cancelled(github, repository_list, monkeypatch):
+    urls = [
+        "https://github.com/test/missing",
+        submission_url(github, "alpha"),
+        submission_url(github, "beta"),
+    ]
+
+    listed = []
+    ls_remote_tags = pr_parser.ls_remote_tags
+
+    def slow_ls_remote_tags(repo_url: str, **kwargs):
+        listed.append(repo_url)
+
+        # Leaves time to cancel the submissions which have not started
+        if "missing" not in repo_url:
+            time.sleep(0.2)
+
+        return ls_remote_tags(repo_url, **kwargs)
+
+    monkeypatch.setattr(pr_parser, "ls_remote_tags", slow_ls_remote_tags)
+
+    with pytest.raises(SubmissionError, match="is not a Git clone URL"):
+        parse(urls, repository_list, jobs=1)
+
+    assert "https://github.com/test/beta.git" not in listed
+
+
+def test_url_already_listed(github, repository_list):
+    with pytest.raises(SubmissionError, match="URL is already in the list"):
+        parse([submission_url(github, "listed")], repository_list)
+
+    # Accepted repositories are listed as well, whatever the URL form
+    with pytest.raises(SubmissionError, match="URL is already in the list"):
+        parse(["https://github.com/test/taken.git/"], repository_list)
+
+
+def test_name_already_taken(github, repository_list):
+    url = submission_url(
+        github, "other", {"1.0.0": {"manifest.toml": manifest("taken", "1.0.0")}}
+    )
+
+    with pytest.raises(
+        SubmissionError,
+        match="A library named taken already exists: https://github.com/test/taken.git",
+    ):
+        parse([url], repository_list)
+
+
+def test_no_tags(github, repository_list):
+    with pytest.raises(SubmissionError, match="has no tags"):
+        parse([submission_url(github, "alpha", tags={})], repository_list)
+
+
+def test_tag_without_manifest(github, repository_list):
+    url = submission_url(github, "alpha", {"1.0.0": {"alpha.scad": ""}})
+
+    with pytest.raises(SubmissionError, match="The tag 1.0.0 has no manifest.toml"):
+        parse([url], repository_list)
+
+
+def test_tag_fetch_refused(github, repository_list, monkeypatch):
+    def fetch_file(repo_url: str, ref: str, file_name: str):
+        raise subprocess.CalledProcessError(128, ["git", "fetch"])
+
+    monkeypatch.setattr(pr_parser, "fetch_file", fetch_file)
+
+    with pytest.raises(
+        SubmissionError,
+        match="Could not fetch the tag 1.0.0 of https://github.com/test/alpha.git",
+    ):
+        parse([submission_url(github, "alpha")], repository_list)
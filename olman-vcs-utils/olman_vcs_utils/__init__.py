@@ -1 +1,6 @@
-from .vcs_utils import downloadFile, getFileDownloadLink, getRepoZipLink
+from .vcs_utils import (
+    downloadFile,
+    downloadFileWithDigest,
+    getFileDownloadLink,
+    getRepoZipLink,
+)
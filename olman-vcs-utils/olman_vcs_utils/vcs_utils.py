@@ -1,6 +1,12 @@
+import hashlib
+import os
+from http import HTTPStatus
+from http.client import HTTPException, IncompleteRead
 from pathlib import Path
-from shutil import copy2
-from urllib.request import urlretrieve
+from urllib.request import Request, urlopen
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_RETRIES = 3
 
 
 def getFileDownloadLink(repo_url: str, file_path: str, branch: str = "main"):
@@ -68,27 +74,113 @@ def getRepoZipLink(
     return zip_link
 
 
-def downloadFile(url: str, dst: str | Path, exist_ok: bool = False) -> Path:
-    dst = Path(dst)
+def _copyChunks(response, f, hasher):
+    while chunk := response.read(DOWNLOAD_CHUNK_SIZE):
+        f.write(chunk)
+        hasher.update(chunk)
+
+    # `read` returns what it got when the connection drops early
+    if response.length:
+        raise IncompleteRead(b"", response.length)
 
-    tmp_path, response = urlretrieve(url=url)
-    tmp_path = Path(tmp_path)
 
-    if dst.is_dir():
-        file_name = response["content-disposition"].split("filename=")[1]
+def downloadFileWithDigest(
+    url: str,
+    dst: str | Path,
+    exist_ok: bool = False,
+    *,
+    sha256: str | None = None,
+    retries: int = DOWNLOAD_RETRIES,
+) -> tuple[Path, str]:
+    """
+    Download a file, computing its SHA-256 while it is written.
+
+    The file is streamed to a `.part` file next to the destination and renamed into
+    place once complete. An interrupted transfer is resumed with an HTTP Range request.
 
-        dst = dst / file_name
+    Parameters:
+        url (str): URL of the file.
+        dst (str | Path): Destination file, or directory to download into. The file name
+            is then taken from the Content-Disposition header.
+        exist_ok (bool, optional): Overwrite an existing destination file.
+        sha256 (str, optional): Expected SHA-256 hex digest of the file.
+        retries (int, optional): Number of times an interrupted transfer is resumed.
 
+    Returns:
+        tuple[Path, str]: Path of the downloaded file and its SHA-256 hex digest.
+    """
+    dst = Path(dst)
+
+    response = urlopen(url)
+
+    try:
         if dst.is_dir():
-            raise FileExistsError(
-                f"A directory with the same name exists: {dst / file_name}"
-            )
+            file_name = response.headers["content-disposition"].split("filename=")[1]
+
+            dst = dst / file_name
+
+            if dst.is_dir():
+                raise FileExistsError(
+                    f"A directory with the same name exists: {dst / file_name}"
+                )
 
-    if not exist_ok and dst.is_file():
-        raise FileExistsError(f"File already exists: {dst}")
+        if not exist_ok and dst.is_file():
+            raise FileExistsError(f"File already exists: {dst}")
 
-    else:
         dst.parent.mkdir(parents=True, exist_ok=True)
-        copy2(tmp_path, dst)
+        part_path = dst.with_name(dst.name + ".part")
+
+        hasher = hashlib.sha256()
+        attempt = 0
+
+        try:
+            with open(part_path, "wb") as f:
+                while True:
+                    try:
+                        _copyChunks(response, f, hasher)
+                        break
+
+                    except (OSError, HTTPException):
+                        attempt += 1
+                        if attempt > retries:
+                            raise
+
+                    offset = f.tell()
+
+                    response.close()
+                    response = urlopen(
+                        Request(url, headers={"Range": f"bytes={offset}-"})
+                    )
+
+                    content_range = response.headers.get("Content-Range", "")
+                    if response.status != HTTPStatus.PARTIAL_CONTENT or (
+                        not content_range.startswith(f"bytes {offset}-")
+                    ):
+                        # The server ignored the range, start over
+                        f.seek(0)
+                        f.truncate()
+                        hasher = hashlib.sha256()
+
+        except BaseException:
+            # Partial files are never resumed by a later call
+            part_path.unlink(missing_ok=True)
+            raise
+
+    finally:
+        response.close()
+
+    digest = hasher.hexdigest()
+
+    if sha256 is not None and digest != sha256.lower():
+        part_path.unlink()
+        raise ValueError(f"SHA-256 mismatch for {url}: expected {sha256}, got {digest}")
+
+    os.replace(part_path, dst)
+
+    return dst, digest
+
+
+def downloadFile(url: str, dst: str | Path, exist_ok: bool = False) -> Path:
+    dst, _ = downloadFileWithDigest(url, dst, exist_ok)
 
     return dst
@@ -0,0 +1,122 @@
+import hashlib
+import threading
+from http import HTTPStatus
+from http.client import HTTPException
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from olman_vcs_utils import downloadFileWithDigest
+
+BODY = bytes(range(256)) * 1024  # 256 KiB, several chunks
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Serves `BODY`. The first `server.cuts` responses are cut after `server.cut_after`
+    bytes. Range requests are honored if `server.honor_range` is set.
+    """
+
+    def do_GET(self):
+        self.server.ranges.append(self.headers.get("Range"))
+
+        start = 0
+        if self.server.honor_range and (range_ := self.headers.get("Range")):
+            start = int(range_.removeprefix("bytes=").split("-")[0])
+
+        body = BODY[start:]
+
+        if start > 0:
+            self.send_response(HTTPStatus.PARTIAL_CONTENT)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(BODY) - 1}/{len(BODY)}"
+            )
+
+        else:
+            self.send_response(HTTPStatus.OK)
+
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        if self.server.cuts > 0:
+            self.server.cuts -= 1
+            body = body[: self.server.cut_after]
+
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.ranges = []
+    server.cuts = 0
+    server.cut_after = 100_000
+    server.honor_range = True
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def url(server) -> str:
+    return f"http://127.0.0.1:{server.server_port}/archive.zip"
+
+
+def test_download(server, tmp_path):
+    path, digest = downloadFileWithDigest(url(server), tmp_path / "archive.zip")
+
+    assert path.read_bytes() == BODY
+    assert digest == hashlib.sha256(BODY).hexdigest()
+    assert server.ranges == [None]
+
+
+def test_resume_after_cut(server, tmp_path):
+    server.cuts = 1
+
+    path, digest = downloadFileWithDigest(
+        url(server), tmp_path / "archive.zip", sha256=hashlib.sha256(BODY).hexdigest()
+    )
+
+    assert path.read_bytes() == BODY
+    assert digest == hashlib.sha256(BODY).hexdigest()
+    assert server.ranges == [None, f"bytes={server.cut_after}-"]
+    assert not (tmp_path / "archive.zip.part").exists()
+
+
+def test_range_ignored_restarts(server, tmp_path):
+    server.cuts = 1
+    server.honor_range = False
+
+    path, digest = downloadFileWithDigest(url(server), tmp_path / "archive.zip")
+
+    # The full body sent again replaces what was received, it is not appended
+    assert path.read_bytes() == BODY
+    assert digest == hashlib.sha256(BODY).hexdigest()
+    assert server.ranges == [None, f"bytes={server.cut_after}-"]
+
+
+def test_retries_exhausted(server, tmp_path):
+    server.cuts = 3
+    server.cut_after = 10_000
+
+    with pytest.raises((OSError, HTTPException)):
+        downloadFileWithDigest(url(server), tmp_path / "archive.zip", retries=2)
+
+    assert len(server.ranges) == 3
+    assert not (tmp_path / "archive.zip").exists()
+    assert not (tmp_path / "archive.zip.part").exists()
+
+
+def test_digest_mismatch(server, tmp_path):
+    with pytest.raises(ValueError, match="SHA-256 mismatch"):
+        downloadFileWithDigest(url(server), tmp_path / "archive.zip", sha256="0" * 64)
+
+    assert not (tmp_path / "archive.zip").exists()
+    assert not (tmp_path / "archive.zip.part").exists()
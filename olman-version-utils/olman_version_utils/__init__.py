@@ -1,4 +1,5 @@
 from .version_utils import (
+    VersionRange,
     version_cmp,
     version_eq,
     version_filter,
@@ -8,5 +9,6 @@ from .version_utils import (
     version_le,
     version_lt,
     version_match,
+    version_range,
     version_sort,
 )
@@ -1,5 +1,5 @@
-from functools import partial
-from typing import Callable, Iterable, Literal, Optional
+from functools import lru_cache
+from typing import Callable, Iterable, Literal, NamedTuple, Optional
 
 from libversion import UPPER_BOUND, Version, version_compare2, version_compare4
 
@@ -7,6 +7,10 @@ _VERSION_EQUAL = 0
 _VERSION_LESS = -1
 _VERSION_GREATER = 1
 
+CONSTRAINT_SEPARATOR = ","
+CONSTRAINT_CACHE_SIZE = 1024
+VERSION_CACHE_SIZE = 16384
+
 
 def version_eq(v1: str, v2: str) -> bool:
     return version_compare2(v1, v2) == _VERSION_EQUAL
@@ -42,7 +46,9 @@ def version_cmp(v1: str, v2: str) -> Literal[-1, 0, 1]:
     return version_compare2(v1, v2)
 
 
-version_key = lambda x: Version(x)
+@lru_cache(maxsize=VERSION_CACHE_SIZE)
+def version_key(version: str) -> Version:
+    return Version(version)
 
 
 def version_sort[
@@ -69,40 +75,114 @@ def version_sort[
         )
 
 
-def _parse_constraint(constraint: str) -> Callable[[str], bool]:
-    operator2cmp = {
-        ">=": version_ge,
-        "<=": version_le,
-        #    '==': version_eq,
-        "=": version_eq,
-        ">": version_gt,
-        "<": version_lt,
-        "^": version_compatible,
-    }
+class VersionRange(NamedTuple):
+    "Interval of versions, unbounded on a side whose bound is None"
+
+    lower: Version | None = None
+    lower_inclusive: bool = True
+    upper: Version | None = None
+    upper_inclusive: bool = True
+
+    def __contains__(self, version: Version) -> bool:
+        if self.lower is not None:
+            if version < self.lower or (
+                not self.lower_inclusive and version == self.lower
+            ):
+                return False
+
+        if self.upper is not None:
+            if version > self.upper or (
+                not self.upper_inclusive and version == self.upper
+            ):
+                return False
+
+        return True
 
-    if constraint[:2] in operator2cmp:
-        cmp = operator2cmp[constraint[:2]]
-        version = constraint[2:]
+    def intersection(self, other: "VersionRange") -> "VersionRange":
+        lower, lower_inclusive = self.lower, self.lower_inclusive
+        if other.lower is not None and (
+            lower is None
+            or other.lower > lower
+            or (other.lower == lower and not other.lower_inclusive)
+        ):
+            lower, lower_inclusive = other.lower, other.lower_inclusive
 
-        return partial(cmp, v2=version)
+        upper, upper_inclusive = self.upper, self.upper_inclusive
+        if other.upper is not None and (
+            upper is None
+            or other.upper < upper
+            or (other.upper == upper and not other.upper_inclusive)
+        ):
+            upper, upper_inclusive = other.upper, other.upper_inclusive
 
-    elif constraint[0] in operator2cmp:
-        cmp = operator2cmp[constraint[:1]]
-        version = constraint[1:]
+        return VersionRange(lower, lower_inclusive, upper, upper_inclusive)
 
-        return partial(cmp, v2=version)
+
+def _parse_clause(clause: str) -> VersionRange:
+    for operator in (">=", "<=", "==", "=", ">", "<", "^"):
+        if clause.startswith(operator):
+            version = clause[len(operator) :].strip()
+            break
 
     else:
-        cmp = version_eq
-        version = constraint
+        operator = "="
+        version = clause
+
+    if version == "":
+        raise ValueError(f"Invalid version constraint: {clause!r}")
+
+    bound = Version(version)
+
+    match operator:
+        case ">=":
+            return VersionRange(lower=bound)
+
+        case "<=":
+            return VersionRange(upper=bound)
+
+        case ">":
+            return VersionRange(lower=bound, lower_inclusive=False)
+
+        case "<":
+            return VersionRange(upper=bound, upper_inclusive=False)
+
+        case "^":
+            # v <= x < (first version component of v).∞
+            vx = version.split(".")[0]
+
+            return VersionRange(
+                lower=bound,
+                upper=Version(vx, UPPER_BOUND),
+                upper_inclusive=False,
+            )
+
+        case _:
+            return VersionRange(lower=bound, upper=bound)
+
+
+@lru_cache(maxsize=CONSTRAINT_CACHE_SIZE)
+def _parse_constraint(constraint: str) -> VersionRange:
+    """
+    Compile a constraint such as `^1.23`, `=1.23`, `<=1.23` or `>=1.23, <=1.48` into
+    a single interval. Comma separated clauses must all be satisfied.
+    """
+    version_range = VersionRange()
+
+    for clause in constraint.split(CONSTRAINT_SEPARATOR):
+        version_range = version_range.intersection(_parse_clause(clause.strip()))
+
+    return version_range
+
 
-        return partial(cmp, v2=version)
+def version_range(constraint: str) -> VersionRange:
+    return _parse_constraint(constraint)
 
 
-def version_match(version: str, constraint: str) -> bool:
-    matcher = _parse_constraint(constraint)
+def version_match(version: str | Version, constraint: str) -> bool:
+    if isinstance(version, str):
+        version = version_key(version)
 
-    return matcher(version)
+    return version in _parse_constraint(constraint)
 
 
 def version_filter[
@@ -0,0 +1,69 @@
+import pytest
+
+from olman_version_utils import VersionRange, version_key, version_match, version_range
+
+
+@pytest.mark.parametrize(
+    "constraint, matching, not_matching",
+    [
+        ("1.2", ["1.2", "1.2.0"], ["1.2.1", "1.1"]),
+        ("=1.2", ["1.2", "1.2.0"], ["1.2.1", "1.1"]),
+        ("==1.2", ["1.2", "1.2.0"], ["1.2.1", "1.1"]),
+        (">=1.2", ["1.2", "1.3", "10.0"], ["1.1.9"]),
+        ("<=1.2", ["1.2", "1.1", "0.1"], ["1.2.1"]),
+        (">1.2", ["1.2.1", "2.0"], ["1.2", "1.1"]),
+        ("<1.2", ["1.1.9", "0.1"], ["1.2", "1.3"]),
+        ("^1.2", ["1.2", "1.2.5", "1.99"], ["1.1", "2.0", "2.0.0"]),
+        ("^0.3", ["0.3", "0.3.1", "0.9"], ["0.2", "1.0"]),
+        ("^0.0.3", ["0.0.3", "0.5"], ["0.0.2", "1.0"]),
+    ],
+)
+def test_operators(constraint, matching, not_matching):
+    for version in matching:
+        assert version_match(version, constraint), version
+
+    for version in not_matching:
+        assert not version_match(version, constraint), version
+
+
+def test_compound():
+    assert version_range(">=1.2, <2") == VersionRange(
+        lower=version_key("1.2"), upper=version_key("2"), upper_inclusive=False
+    )
+
+    assert version_match("1.5", ">=1.2, <2")
+    assert not version_match("2.0", ">=1.2, <2")
+    assert not version_match("1.1", ">=1.2, <2")
+
+    # The tightest bound of every side wins
+    assert version_match("1.4", ">=1.2, >1.3, <=1.8, <1.5")
+    assert not version_match("1.3", ">=1.2, >1.3, <=1.8, <1.5")
+    assert not version_match("1.5", ">=1.2, >1.3, <=1.8, <1.5")
+
+    # A strict bound wins over an inclusive one on the same version
+    assert not version_match("1.2", ">=1.2, >1.2")
+    assert not version_match("1.2", "<1.2, <=1.2")
+
+    assert version_match("1.7", "^1.2, <1.8")
+    assert not version_match("1.8", "^1.2, <1.8")
+
+
+def test_empty_intersection():
+    for version in ["1.0", "1.5", "2.0", "3.0"]:
+        assert not version_match(version, ">2, <1")
+        assert not version_match(version, "=1.0, =2.0")
+
+
+def test_whitespace():
+    assert version_range(" >= 1.2 ,< 2 ") == version_range(">=1.2,<2")
+    assert version_match("1.2", " ^ 1.2 ")
+
+
+def test_version_objects():
+    assert version_match(version_key("1.2"), ">=1.2")
+
+
+@pytest.mark.parametrize("constraint", ["", " ", ">=", "^ ", "1.0,", ">=1.0, , <2"])
+def test_malformed(constraint):
+    with pytest.raises(ValueError):
+        version_range(constraint)